@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Resource Store Check Script for the MCP SQL Analytics Server.
+Runs two ResourceManagers on one scratch storage path, the way the server and
+cleanup_resources.py share data/resources, and verifies they stay consistent.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add src to path for imports
+sys.path.append(str(Path(__file__).parent / "src"))
+
+from core.resource_manager import ResourceManager
+
+def table(i: int) -> dict:
+    """A one-row table payload that differs per i."""
+    return {"columns": ["x"], "rows": [[i]], "row_count": 1}
+
+async def check_delete_all_with_running_server() -> list:
+    """delete_all from a second manager must not leave entries the server stored."""
+    problems = []
+    server = ResourceManager()
+    script = ResourceManager()
+    try:
+        for i in range(3):
+            await server.store_table_resource(table(i), f"SELECT {i}")
+        await server.flush()
+        
+        # The server compacts and keeps storing, so the script's view is stale
+        server._compact()
+        await server.store_table_resource(table(3), "SELECT 3")
+        await server.flush()
+        
+        deleted = script.delete_all()
+        if len(deleted) != 4 or script.count() != 0:
+            problems.append(f"delete_all deleted {len(deleted)} and kept {script.count()}, expected 4 and 0")
+        
+        fresh = ResourceManager()
+        try:
+            if fresh.count() != 0:
+                problems.append(f"a fresh manager still sees {fresh.count()} resources after delete_all")
+        finally:
+            fresh.close()
+    finally:
+        server.close()
+        script.close()
+    
+    return problems
+
+def main():
+    """Run every check against a scratch storage path."""
+    checks = [check_delete_all_with_running_server]
+    failed = False
+    
+    for check in checks:
+        with tempfile.TemporaryDirectory() as storage_path:
+            os.environ["RESOURCE_STORAGE_PATH"] = storage_path
+            problems = asyncio.run(check())
+        
+        if problems:
+            failed = True
+            print(f"❌ {check.__name__}")
+            for problem in problems:
+                print(f"   - {problem}")
+        else:
+            print(f"✅ {check.__name__}")
+    
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -14,8 +14,14 @@ sys.path.append(str(Path(__file__).parent / "src"))
 
 from core.resource_manager import ResourceManager
 
+def print_deleted(uris: list):
+    """Print the URIs removed by a bulk delete."""
+    for uri in uris:
+        print(f"   ✅ Deleted: {uri}")
+
 async def cleanup_resources(cleanup_type: str, resource_type: str = None, 
-                          resource_uri: str = None, force: bool = False):
+                          resource_uri: str = None, force: bool = False,
+                          verbose: bool = False):
     """Clean up resources based on specified criteria."""
     
     resource_manager = ResourceManager()
@@ -24,34 +30,28 @@ async def cleanup_resources(cleanup_type: str, resource_type: str = None,
     print("=" * 50)
     
     if cleanup_type == "all":
+        resource_count = resource_manager.count()
+        
         if not force:
-            confirm = input("⚠️  This will delete ALL resources. Are you sure? (y/N): ")
+            confirm = input(f"⚠️  This will delete ALL {resource_count} resources. Are you sure? (y/N): ")
             if confirm.lower() != 'y':
                 print("❌ Cleanup cancelled.")
                 return
         
-        # Get all resources
-        all_resources = list(resource_manager.resources.keys())
-        print(f"🗑️  Deleting {len(all_resources)} resources...")
+        print(f"🗑️  Deleting {resource_count} resources...")
         
-        for uri in all_resources:
-            resource_manager._delete_resource(uri)
-            print(f"   ✅ Deleted: {uri}")
+        deleted = resource_manager.delete_all()
+        if verbose:
+            print_deleted(deleted)
         
-        print(f"🎉 Successfully cleaned {len(all_resources)} resources.")
+        print(f"🎉 Successfully cleaned {len(deleted)} resources.")
     
     elif cleanup_type == "expired":
         print("🕐 Cleaning expired resources...")
         
-        # Get current resources count
-        initial_count = len(resource_manager.resources)
-        
         # Run cleanup (this will delete expired resources)
-        resource_manager._cleanup_expired_resources()
-        
-        # Get final count
+        deleted_count = resource_manager._cleanup_expired_resources(force=True)
         final_count = len(resource_manager.resources)
-        deleted_count = initial_count - final_count
         
         print(f"🎉 Cleaned {deleted_count} expired resources.")
         print(f"📊 Remaining resources: {final_count}")
@@ -61,25 +61,21 @@ async def cleanup_resources(cleanup_type: str, resource_type: str = None,
             print("❌ Error: resource_type is required for 'by_type' cleanup.")
             return
         
+        resource_count = resource_manager.count(resource_type)
+        
         if not force:
-            confirm = input(f"⚠️  This will delete all '{resource_type}' resources. Are you sure? (y/N): ")
+            confirm = input(f"⚠️  This will delete all {resource_count} '{resource_type}' resources. Are you sure? (y/N): ")
             if confirm.lower() != 'y':
                 print("❌ Cleanup cancelled.")
                 return
         
-        # Find resources of specified type
-        resources_to_delete = []
-        for uri, metadata in resource_manager.resources.items():
-            if metadata.get("type") == resource_type:
-                resources_to_delete.append(uri)
+        print(f"🗑️  Deleting {resource_count} '{resource_type}' resources...")
         
-        print(f"🗑️  Deleting {len(resources_to_delete)} '{resource_type}' resources...")
+        deleted = resource_manager.delete_by_type(resource_type)
+        if verbose:
+            print_deleted(deleted)
         
-        for uri in resources_to_delete:
-            resource_manager._delete_resource(uri)
-            print(f"   ✅ Deleted: {uri}")
-        
-        print(f"🎉 Successfully cleaned {len(resources_to_delete)} '{resource_type}' resources.")
+        print(f"🎉 Successfully cleaned {len(deleted)} '{resource_type}' resources.")
     
     elif cleanup_type == "specific":
         if not resource_uri:
@@ -118,6 +114,7 @@ def main():
         epilog="""
 Examples:
   python cleanup_resources.py --type all --force
+  python cleanup_resources.py --type all --force --verbose
   python cleanup_resources.py --type expired
   python cleanup_resources.py --type by_type --resource-type table --force
   python cleanup_resources.py --type specific --resource-uri resource://tables/abc123
@@ -148,6 +145,12 @@ Examples:
         help="Skip confirmation prompts"
     )
     
+    parser.add_argument(
+        "--verbose", "-v",
+        action="store_true",
+        help="List each deleted resource URI"
+    )
+    
     args = parser.parse_args()
     
     # Validate arguments
@@ -165,7 +168,8 @@ Examples:
             cleanup_type=args.type,
             resource_type=args.resource_type,
             resource_uri=args.resource_uri,
-            force=args.force
+            force=args.force,
+            verbose=args.verbose
         ))
     except KeyboardInterrupt:
         print("\n❌ Cleanup interrupted by user.")
@@ -3,13 +3,39 @@ Prompt Manager for the MCP server.
 Handles interactive workflow templates and prompt discovery.
 """
 
-from typing import List, Dict, Any, Optional
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Set
+
+# Line patterns used when parsing template sections. _SECTION_RE matches any
+# bold line; group 1 is set only for the section headers we collect.
+_HEAD_RE = re.compile(r'^#\s+(.*)')
+_SECTION_RE = re.compile(r'^\*\*(?:(Parameters|Example|Tools to use|Workflow):\*\*)?')
+_BULLET_RE = re.compile(r'^-\s*`([^`]+)`')
+_STEP_RE = re.compile(r'^\d+\.\s+(.*)')
+
+# Words indexed for prompt search
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
 
 class PromptManager:
     """Manages interactive prompts for the MCP server."""
     
     def __init__(self):
         self.prompts = self._initialize_prompts()
+        
+        # Templates are static, so parse metadata and lowercase text for search once
+        self._metadata: Dict[str, Dict[str, Any]] = {}
+        self._search_index: Dict[str, str] = {}
+        
+        # Inverted index for search: token -> prompt names, plus the sorted
+        # vocabulary so partial words can be resolved with a prefix scan
+        self._token_index: Dict[str, Set[str]] = defaultdict(set)
+        self._prompt_tokens: Dict[str, Set[str]] = {}
+        self._sorted_tokens: List[str] = []
+        
+        for name, template in self.prompts.items():
+            self._index_prompt(name, template)
     
     def _initialize_prompts(self) -> Dict[str, str]:
         """Initialize the available prompts."""
@@ -223,6 +249,42 @@ Use this prompt to export table data in various formats.
 """
         }
     
+    def _index_prompt(self, name: str, template: str):
+        """Cache parsed metadata and searchable text for a prompt."""
+        self._unindex_prompt(name)
+        self._metadata[name] = {"name": name, **self._parse_template(template)}
+        self._search_index[name] = f"{name.lower()}\n{template.lower()}"
+        
+        tokens = set(_TOKEN_RE.findall(self._search_index[name]))
+        self._prompt_tokens[name] = tokens
+        for token in tokens:
+            self._token_index[token].add(name)
+        self._sorted_tokens = sorted(self._token_index)
+    
+    def _unindex_prompt(self, name: str):
+        """Drop a prompt from the metadata cache and search indexes."""
+        self._metadata.pop(name, None)
+        self._search_index.pop(name, None)
+        
+        tokens = self._prompt_tokens.pop(name, None)
+        if not tokens:
+            return
+        for token in tokens:
+            names = self._token_index[token]
+            names.discard(name)
+            if not names:
+                del self._token_index[token]
+        self._sorted_tokens = sorted(self._token_index)
+    
+    def _prompts_with_prefix(self, prefix: str) -> Set[str]:
+        """Prompt names containing a word that starts with prefix."""
+        names = set()
+        i = bisect_left(self._sorted_tokens, prefix)
+        while i < len(self._sorted_tokens) and self._sorted_tokens[i].startswith(prefix):
+            names |= self._token_index[self._sorted_tokens[i]]
+            i += 1
+        return names
+    
     async def list_prompts(self) -> List[str]:
         """List all available prompts."""
         return list(self.prompts.keys())
@@ -235,6 +297,7 @@ Use this prompt to export table data in various formats.
         """Add a new prompt template."""
         try:
             self.prompts[name] = template
+            self._index_prompt(name, template)
             return True
         except Exception:
             return False
@@ -244,6 +307,7 @@ Use this prompt to export table data in various formats.
         try:
             if name in self.prompts:
                 del self.prompts[name]
+                self._unindex_prompt(name)
                 return True
             return False
         except Exception:
@@ -251,122 +315,65 @@ Use this prompt to export table data in various formats.
     
     async def search_prompts(self, query: str) -> List[str]:
         """Search prompts by content."""
-        matching_prompts = []
         query_lower = query.lower()
+        query_tokens = _TOKEN_RE.findall(query_lower)
         
-        for name, template in self.prompts.items():
-            if query_lower in name.lower() or query_lower in template.lower():
-                matching_prompts.append(name)
+        # Nothing indexable in the query: match against prompt names only
+        if not query_tokens:
+            return [name for name in self.prompts if query_lower in name.lower()]
+        
+        # Every query word must start some word of the prompt
+        candidates = self._prompts_with_prefix(query_tokens[0])
+        for token in query_tokens[1:]:
+            if not candidates:
+                break
+            candidates &= self._prompts_with_prefix(token)
         
-        return matching_prompts
+        # Confirm the full phrase against the few remaining candidates
+        return [
+            name for name in self.prompts
+            if name in candidates and query_lower in self._search_index[name]
+        ]
     
     async def get_prompt_metadata(self, name: str) -> Dict[str, Any]:
         """Get metadata about a specific prompt."""
         if name not in self.prompts:
             return {"error": f"Prompt '{name}' not found."}
         
-        template = self.prompts[name]
-        
-        # Extract basic metadata
-        metadata = {
-            "name": name,
-            "description": self._extract_description(template),
-            "parameters": self._extract_parameters(template),
-            "examples": self._extract_examples(template),
-            "tools": self._extract_tools(template),
-            "workflow_steps": self._extract_workflow(template)
-        }
-        
-        return metadata
-    
-    def _extract_description(self, template: str) -> str:
-        """Extract description from prompt template."""
-        lines = template.split('\n')
-        for line in lines:
-            if line.startswith('# '):
-                return line[2:].strip()
-        return "No description available"
-    
-    def _extract_parameters(self, template: str) -> List[str]:
-        """Extract parameters from prompt template."""
-        parameters = []
-        in_params_section = False
-        
-        for line in template.split('\n'):
-            if '**Parameters:**' in line:
-                in_params_section = True
-                continue
-            elif in_params_section and line.startswith('**'):
-                break
-            elif in_params_section and line.strip().startswith('- `'):
-                param = line.strip()[3:].split('`')[0]
-                parameters.append(param)
-        
-        return parameters
-    
-    def _extract_examples(self, template: str) -> List[str]:
-        """Extract examples from prompt template."""
-        examples = []
-        in_examples_section = False
-        
-        for line in template.split('\n'):
-            if '**Example:**' in line:
-                in_examples_section = True
-                continue
-            elif in_examples_section and line.startswith('**'):
-                break
-            elif in_examples_section and line.strip().startswith('```'):
-                continue
-            elif in_examples_section and line.strip():
-                examples.append(line.strip())
-        
-        return examples
+        return self._metadata[name]
     
-    def _extract_tools(self, template: str) -> List[str]:
-        """Extract tools from prompt template."""
-        tools = []
-        in_tools_section = False
+    def _parse_template(self, template: str) -> Dict[str, Any]:
+        """Extract description, parameters, examples, tools and workflow in one pass."""
+        description = None
+        sections = {"Parameters": [], "Example": [], "Tools to use": [], "Workflow": []}
+        current_section = None
         
         for line in template.split('\n'):
-            if '**Tools to use:**' in line:
-                in_tools_section = True
-                continue
-            elif in_tools_section and line.startswith('**'):
-                break
-            elif in_tools_section and line.strip().startswith('- `'):
-                tool = line.strip()[3:].split('`')[0]
-                tools.append(tool)
+            stripped = line.strip()
+            head_match = _HEAD_RE.match(line) if description is None else None
+            section_match = _SECTION_RE.match(line)
+            
+            if head_match:
+                description = head_match.group(1).strip()
+            elif section_match:
+                # A known "**Name:**" header opens a section; any other bold line closes it
+                current_section = section_match.group(1)
+            elif current_section in ("Parameters", "Tools to use"):
+                match = _BULLET_RE.match(stripped)
+                if match:
+                    sections[current_section].append(match.group(1))
+            elif current_section == "Example":
+                if stripped and not stripped.startswith('```'):
+                    sections["Example"].append(stripped)
+            elif current_section == "Workflow":
+                match = _STEP_RE.match(stripped)
+                if match:
+                    sections["Workflow"].append(match.group(1))
         
-        return tools
-    
-    def _extract_workflow(self, template: str) -> List[str]:
-        """Extract workflow steps from prompt template."""
-        workflow = []
-        in_workflow_section = False
-        
-        for line in template.split('\n'):
-            if '**Workflow:**' in line:
-                in_workflow_section = True
-                continue
-            elif in_workflow_section and line.startswith('**'):
-                break
-            elif in_workflow_section and line.strip().startswith('1. '):
-                step = line.strip()[3:]
-                workflow.append(step)
-            elif in_workflow_section and line.strip().startswith('2. '):
-                step = line.strip()[3:]
-                workflow.append(step)
-            elif in_workflow_section and line.strip().startswith('3. '):
-                step = line.strip()[3:]
-                workflow.append(step)
-            elif in_workflow_section and line.strip().startswith('4. '):
-                step = line.strip()[3:]
-                workflow.append(step)
-            elif in_workflow_section and line.strip().startswith('5. '):
-                step = line.strip()[3:]
-                workflow.append(step)
-            elif in_workflow_section and line.strip().startswith('6. '):
-                step = line.strip()[3:]
-                workflow.append(step)
-        
-        return workflow 
\ No newline at end of file
+        return {
+            "description": description or "No description available",
+            "parameters": sections["Parameters"],
+            "examples": sections["Example"],
+            "tools": sections["Tools to use"],
+            "workflow_steps": sections["Workflow"]
+        }
@@ -3,95 +3,735 @@ Resource Manager for the MCP server.
 Handles storage and retrieval of tables, charts, and other resources.
 """
 
+import asyncio
+import atexit
+import hashlib
 import json
+import logging
+import mmap
 import os
 import uuid
 import re
+import weakref
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import islice
+import heapq
+import threading
+import time
+import orjson
+from collections import OrderedDict, defaultdict
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Tuple
 from mcp.types import Resource, TextContent, ImageContent, EmbeddedResource
 
+try:
+    import fcntl
+except ImportError:  # Windows: journal writes and compaction go unlocked
+    fcntl = None
+
+# Per-call diagnostics go through logging so they cost nothing unless debug output is enabled
+logger = logging.getLogger(__name__)
+
+def _dumps(obj: Any, indent: bool = True) -> bytes:
+    """Serialize to JSON bytes; values orjson can't handle natively fall back to str()."""
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    return orjson.dumps(obj, default=str, option=option)
+
+# Chart and ML payloads larger than this are truncated when embedded in markdown
+_MAX_EMBEDDED_JSON_CHARS = 64_000
+
+# Table files larger than this are previewed by parsing only their first rows
+_TABLE_PREVIEW_MIN_BYTES = 1_000_000
+_TABLE_PREVIEW_ROWS = 5
+_TABLE_DATA_KEY = b'\n  "data": ['
+_TABLE_ROW_COUNT_RE = re.compile(rb'\n  "row_count": (\d+)')
+
+def _read_table_preview(resource_file: Path, limit: int = _TABLE_PREVIEW_ROWS) -> Optional[Tuple[List[Any], int]]:
+    """Parse only the first rows of a stored table's "data" array.
+    
+    Returns (rows, total row count), or None if the file isn't laid out as
+    written by _dumps and needs a full parse instead.
+    """
+    with open(resource_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        count_match = _TABLE_ROW_COUNT_RE.search(mm)
+        start = mm.find(_TABLE_DATA_KEY)
+        if count_match is None or start == -1:
+            return None
+        
+        decoder = json.JSONDecoder()
+        pos = start + len(_TABLE_DATA_KEY)
+        window = 64 * 1024
+        rows = []
+        while len(rows) < limit:
+            text = mm[pos:pos + window].decode('utf-8', errors='ignore')
+            item = text.lstrip(' \r\n\t,')
+            if item.startswith(']'):
+                break
+            
+            try:
+                row, end = decoder.raw_decode(item)
+            except json.JSONDecodeError:
+                end = len(item)
+            
+            # A value running to the end of the window may be cut short; widen and retry
+            if end >= len(item):
+                if pos + window >= len(mm):
+                    return None
+                window *= 2
+                continue
+            
+            rows.append(row)
+            pos += len(text[:len(text) - len(item) + end].encode('utf-8'))
+        
+        return rows, int(count_match.group(1))
+
+_FROM_RE = re.compile(r'from\s+(\w+)', re.IGNORECASE)
+
+# Keyword -> tag tables scanned by _table_resource_tags
+_SQL_KEYWORD_TAGS = {
+    "select": "query",
+    "join": "join",
+    "group by": "aggregation",
+    "order by": "sorted",
+    "limit": "limited",
+}
+_COLUMN_KEYWORD_TAGS = {
+    "id": "identifier",
+    "name": "name",
+    "date": "temporal",
+    "time": "temporal",
+    "amount": "financial",
+    "price": "financial",
+    "cost": "financial",
+    "count": "metrics",
+    "total": "metrics",
+}
+
+# Auto-generated metadata depends only on these fields, so repeat stores of
+# the same query template skip the SQL and column scans
+@lru_cache(maxsize=4096)
+def _table_resource_name(sql_query: str) -> str:
+    """Derive a table resource name from its SQL query."""
+    if sql_query:
+        # Extract table name or create descriptive name from SQL
+        match = _FROM_RE.search(sql_query)
+        if match:
+            table_name = match.group(1)
+            return f"{table_name.title()} Query Results"
+        
+        # Create name from query type
+        sql_l = sql_query.lower()
+        if "select" in sql_l:
+            if "count" in sql_l:
+                return "Count Query Results"
+            elif "sum" in sql_l or "avg" in sql_l:
+                return "Aggregation Query Results"
+            else:
+                return "Data Query Results"
+    
+    return "Table Resource"
+
+@lru_cache(maxsize=4096)
+def _table_resource_description(sql_query: str, row_count: int, columns: Tuple[str, ...]) -> str:
+    """Describe a table resource from its query, row count and columns."""
+    desc = f"Query results with {row_count} rows"
+    if columns:
+        desc += f" and {len(columns)} columns: {', '.join(columns[:3])}"
+        if len(columns) > 3:
+            desc += f" and {len(columns) - 3} more"
+    
+    if sql_query:
+        desc += f". Generated from SQL: {sql_query[:100]}"
+        if len(sql_query) > 100:
+            desc += "..."
+    
+    return desc
+
+@lru_cache(maxsize=4096)
+def _table_resource_tags(sql_query: str, columns: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Tag a table resource by SQL keywords and column names."""
+    tags = {"table"}
+    
+    # Add tags based on SQL keywords
+    sql_l = sql_query.lower()
+    tags.update(tag for keyword, tag in _SQL_KEYWORD_TAGS.items() if keyword in sql_l)
+    
+    # Add tags based on column names
+    for col in columns:
+        col_l = col.lower()
+        tags.update(tag for keyword, tag in _COLUMN_KEYWORD_TAGS.items() if keyword in col_l)
+    
+    return tuple(tags)
+
+@lru_cache(maxsize=4096)
+def _schema_resource_description(db_type: str, table_names: Tuple[str, ...]) -> str:
+    """Describe a schema resource from its database type and table names."""
+    desc = f"{db_type.title()} database schema with {len(table_names)} tables"
+    if table_names:
+        desc += f" including: {', '.join(table_names[:3])}"
+        if len(table_names) > 3:
+            desc += f" and {len(table_names) - 3} more"
+    
+    return desc
+
+def _search_text(metadata: Dict[str, Any]) -> Tuple[str, frozenset]:
+    """Lowercased searchable fields of a resource (joined by NUL) and the set of their words."""
+    type_metadata = metadata.get("metadata", {})
+    fields = [
+        metadata.get("name", ""),
+        metadata.get("description", ""),
+        *metadata.get("tags", []),
+        type_metadata.get("sql_query", ""),
+        *type_metadata.get("columns", [])
+    ]
+    text = "\0".join(fields).lower()
+    return text, frozenset(text.replace("\0", " ").split())
+
+# Managers with a journal open; flushed at exit without keeping them alive
+_open_managers: "weakref.WeakSet[ResourceManager]" = weakref.WeakSet()
+
+@atexit.register
+def _flush_open_managers():
+    """Flush the buffered journal of every manager still open at interpreter exit."""
+    for manager in list(_open_managers):
+        manager._flush_journal()
+
 class ResourceManager:
     """Manages resources (tables, charts, ML results) for the MCP server."""
     
     def __init__(self):
         self.storage_path = Path(os.getenv("RESOURCE_STORAGE_PATH", "./data/resources"))
         self.expiry_hours = int(os.getenv("RESOURCE_EXPIRY_HOURS", "24"))
+        self._expiry_delta = timedelta(hours=self.expiry_hours)
+        self._expiry_seconds = self._expiry_delta.total_seconds()
         self.resources: Dict[str, Dict[str, Any]] = {}
         
-        # Ensure storage directory exists
+        # Secondary index: resource type -> URIs of that type
+        self._by_type: Dict[str, Set[str]] = defaultdict(set)
+        
+        # Secondary indexes: tag / category -> URIs carrying that tag or category
+        self._by_tag: Dict[str, Set[str]] = defaultdict(set)
+        self._by_category: Dict[str, Set[str]] = defaultdict(set)
+        
+        # uri -> normalized search text, computed once so searches don't re-lowercase every field
+        self._search_text: Dict[str, Tuple[str, frozenset]] = {}
+        
+        # URIs oldest first by created_at; stores and renewals always carry the
+        # newest timestamp, so they just move to the end
+        self._by_recency: "OrderedDict[str, None]" = OrderedDict()
+        
+        # Min-heap of (expiry epoch, uri); entries for deleted or re-stored
+        # resources go stale and are skipped when popped
+        self._expiry_heap: List[Tuple[float, str]] = []
+        
+        # list_resources runs cleanup on every call; scan at most once per interval
+        self._cleanup_interval = float(os.getenv("RESOURCE_CLEANUP_INTERVAL", "60"))
+        self._last_cleanup = float("-inf")
+        
+        # Content hash of the serialized data -> URI, so re-storing identical data reuses the resource
+        self._content_index: Dict[str, str] = {}
+        
+        # Resource listing built by list_resources; reset whenever a resource is added or removed
+        self._list_cache: Optional[List[Resource]] = None
+        
+        # LRU of parsed resource files: uri -> (file mtime_ns, data, raw JSON text or None)
+        self._read_cache: "OrderedDict[str, Tuple[int, Any, Optional[str]]]" = OrderedDict()
+        self._read_cache_size = int(os.getenv("RESOURCE_READ_CACHE_SIZE", "128"))
+        
+        # Serializes metadata mutation + journal writes when deletes run on worker threads
+        self._lock = threading.RLock()
+        
+        # metadata.json is a snapshot; changes since the last compaction are
+        # appended to metadata.jsonl so a store doesn't rewrite every entry
+        self._journal_max_bytes = int(os.getenv("RESOURCE_JOURNAL_MAX_BYTES", str(1024 * 1024)))
+        self._metadata_file = self.storage_path / "metadata.json"
+        self._journal_file = self.storage_path / "metadata.jsonl"
+        # Other processes (e.g. cleanup_resources.py) share these files, so loads,
+        # journal writes and compaction hold an exclusive lock on metadata.lock
+        self._lock_file = self.storage_path / "metadata.lock"
+        # Entries waiting for the next flush, and how many journal bytes self.resources reflects
+        self._pending_journal = bytearray()
+        self._journal_seen = 0
+        self._snapshot_mtime = None
+        
+        # Journal writes are buffered; inside the event loop a burst of changes
+        # is flushed together after RESOURCE_FLUSH_DELAY_MS
+        self._flush_delay = int(os.getenv("RESOURCE_FLUSH_DELAY_MS", "100")) / 1000
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        
+        # RESOURCE_DURABILITY: "none" leaves syncing to the OS, "batch" fsyncs the
+        # journal once per flush and the snapshot on compaction, "always" also
+        # fsyncs every journal entry and resource file
+        self._durability = os.getenv("RESOURCE_DURABILITY", "batch").lower()
+        if self._durability not in ("none", "batch", "always"):
+            print(f"Warning: Unknown RESOURCE_DURABILITY '{self._durability}', using 'batch'")
+            self._durability = "batch"
+        
+        # Data directory per resource type (ML results live in "ml", not "mls")
+        self._type_dirs = {
+            "table": self.storage_path / "tables",
+            "chart": self.storage_path / "charts",
+            "ml": self.storage_path / "ml",
+            "schema": self.storage_path / "schemas"
+        }
+        
+        # Ensure storage directories exist
         self.storage_path.mkdir(parents=True, exist_ok=True)
+        for type_dir in self._type_dirs.values():
+            type_dir.mkdir(exist_ok=True)
+        
+        self._lock_handle = open(self._lock_file, 'ab')
         
         # Load existing resources
         self._load_resources()
+        
+        self._journal = open(self._journal_file, 'ab', buffering=0)
+        _open_managers.add(self)
+        
+        # Fold entries replayed at startup into the snapshot so they are only replayed once
+        if self._journal_seen > 0:
+            self._compact()
+    
+    @contextmanager
+    def _file_lock(self):
+        """Hold the cross-process lock on this storage path's metadata files."""
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._lock_handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_handle, fcntl.LOCK_UN)
     
     def _load_resources(self):
         """Load existing resources from storage."""
+        with self._file_lock():
+            self._read_metadata_files()
+        self._rebuild_indexes()
+    
+    def _read_metadata_files(self):
+        """Read the snapshot and replay the journal; the caller holds the file lock."""
+        self.resources = {}
+        self._journal_seen = 0
+        self._snapshot_mtime = None
         try:
-            metadata_file = self.storage_path / "metadata.json"
-            if metadata_file.exists():
-                with open(metadata_file, 'r') as f:
-                    self.resources = json.load(f)
+            if self._metadata_file.exists():
+                self._snapshot_mtime = self._metadata_file.stat().st_mtime_ns
+                self.resources = orjson.loads(self._metadata_file.read_bytes())
         except Exception as e:
             print(f"Warning: Could not load resource metadata: {e}")
             self.resources = {}
+        
+        self._replay_journal()
     
-    def _save_metadata(self):
-        """Save resource metadata to storage."""
+    def _replay_journal(self):
+        """Apply journaled puts/deletes written since the last compaction."""
+        if not self._journal_file.exists():
+            return
+        
         try:
-            metadata_file = self.storage_path / "metadata.json"
-            with open(metadata_file, 'w') as f:
-                json.dump(self.resources, f, indent=2, default=str)
+            with open(self._journal_file, 'rb') as f:
+                for line in f:
+                    try:
+                        entry = orjson.loads(line)
+                    except orjson.JSONDecodeError:
+                        # A torn final line from an interrupted write
+                        print("Warning: Skipping unreadable journal entry")
+                        continue
+                    if entry["op"] == "put":
+                        self.resources[entry["uri"]] = entry["meta"]
+                    elif entry["op"] == "del":
+                        self.resources.pop(entry["uri"], None)
+                self._journal_seen = f.tell()
+        except Exception as e:
+            print(f"Warning: Could not replay resource journal: {e}")
+    
+    def _rebuild_indexes(self):
+        """Rebuild the secondary indexes from self.resources."""
+        self._by_type.clear()
+        self._by_tag.clear()
+        self._by_category.clear()
+        self._search_text.clear()
+        self._by_recency.clear()
+        self._expiry_heap.clear()
+        self._content_index.clear()
+        self._list_cache = None
+        for uri, metadata in self.resources.items():
+            self._index_resource(uri, metadata)
+        
+        # Loaded entries aren't necessarily in creation order. Sorting the reversed
+        # dict keeps equal timestamps in dict order when read newest first
+        for uri in sorted(reversed(self.resources), key=lambda uri: self.resources[uri].get("created_at", "")):
+            self._by_recency.move_to_end(uri)
+    
+    def _index_resource(self, uri: str, metadata: Dict[str, Any]):
+        """Add a resource to the secondary indexes."""
+        self._list_cache = None
+        self._by_type[metadata.get("type", "unknown")].add(uri)
+        for tag in metadata.get("tags", []):
+            self._by_tag[tag].add(uri)
+        self._by_category[metadata.get("category")].add(uri)
+        self._search_text[uri] = _search_text(metadata)
+        self._by_recency[uri] = None
+        self._by_recency.move_to_end(uri)
+        heapq.heappush(self._expiry_heap, (self._expires_at_ts(metadata), uri))
+        if metadata.get("content_hash"):
+            self._content_index[metadata["content_hash"]] = uri
+    
+    def _expires_at_ts(self, metadata: Dict[str, Any]) -> float:
+        """Epoch time at which a resource expires."""
+        created_at_ts = metadata.get("created_at_ts")
+        if created_at_ts is None:
+            # Entries written before created_at_ts existed only carry the ISO string
+            try:
+                created_at_ts = datetime.fromisoformat(metadata["created_at"]).timestamp()
+            except (KeyError, TypeError, ValueError):
+                created_at_ts = 0.0
+            metadata["created_at_ts"] = created_at_ts
+        return created_at_ts + self._expiry_seconds
+    
+    def _unindex_resource(self, uri: str, metadata: Dict[str, Any]):
+        """Remove a resource from the secondary indexes."""
+        self._list_cache = None
+        self._by_type[metadata.get("type", "unknown")].discard(uri)
+        for tag in metadata.get("tags", []):
+            self._by_tag[tag].discard(uri)
+        self._by_category[metadata.get("category")].discard(uri)
+        self._search_text.pop(uri, None)
+        self._by_recency.pop(uri, None)
+        if self._content_index.get(metadata.get("content_hash")) == uri:
+            del self._content_index[metadata["content_hash"]]
+    
+    def _content_hash(self, resource_type: str, payload: bytes) -> str:
+        """Hash serialized resource data, scoped to the resource type."""
+        return hashlib.blake2b(resource_type.encode() + b"\0" + payload, digest_size=16).hexdigest()
+    
+    def _reuse_resource(self, content_hash: str, name: str = None, description: str = None,
+                        tags: List[str] = None, category: str = None,
+                        **type_specific_metadata) -> Optional[str]:
+        """Return the URI of a stored resource with identical data, renewing its expiry
+        and applying any name/description/tags/category the caller supplied."""
+        uri = self._content_index.get(content_hash)
+        metadata = self.resources.get(uri) if uri else None
+        if metadata is None:
+            return None
+        
+        # Tags and category are indexed, so drop the old entries before changing them
+        self._unindex_resource(uri, metadata)
+        custom_fields = {"name": name, "description": description, "tags": tags, "category": category}
+        metadata.update({key: value for key, value in custom_fields.items() if value})
+        metadata.setdefault("metadata", {}).update(
+            {key: value for key, value in type_specific_metadata.items() if value is not None})
+        
+        now = datetime.now()
+        metadata["created_at"] = now.isoformat()
+        metadata["created_at_ts"] = now.timestamp()
+        metadata["expires_at"] = (now + self._expiry_delta).isoformat()
+        self._index_resource(uri, metadata)
+        self._append_journal("put", uri, metadata)
+        return uri
+    
+    def _save_metadata(self) -> bool:
+        """Save resource metadata to storage, returning whether the snapshot was written."""
+        try:
+            # Only the server reads metadata.json, so skip the indentation
+            self._snapshot_mtime = self._write_bytes(self._metadata_file, _dumps(self.resources, indent=False),
+                                                     sync=self._durability != "none")
+            return True
         except Exception as e:
             print(f"Warning: Could not save resource metadata: {e}")
+            return False
+    
+    def _write_bytes(self, path: Path, payload: bytes, sync: bool = None) -> int:
+        """Atomically write bytes via a temp file and os.replace, returning the file's mtime_ns."""
+        if sync is None:
+            sync = self._durability == "always"
+        # A unique temp name, so concurrent writes of the same file don't share one.
+        # Mode 0o666 lets the process umask decide the permissions, as open() would
+        tmp_name = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        fd = os.open(tmp_name, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+                if sync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_name, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except FileNotFoundError:
+                pass
+            raise
+        return path.stat().st_mtime_ns
+    
+    def _read_resource_file(self, resource_file: Path) -> Tuple[bytes, Any]:
+        """Read a resource's data file, returning the raw bytes and parsed data."""
+        raw_bytes = resource_file.read_bytes()
+        return raw_bytes, orjson.loads(raw_bytes)
+    
+    def _append_journal(self, op: str, uri: str, metadata: Dict[str, Any] = None):
+        """Record a single metadata change, compacting once the journal grows large."""
+        entry = {"op": op, "uri": uri}
+        if metadata is not None:
+            entry["meta"] = metadata
+        
+        with self._lock:
+            try:
+                self._pending_journal += _dumps(entry, indent=False) + b"\n"
+                if self._journal_seen + len(self._pending_journal) > self._journal_max_bytes:
+                    self._compact()
+                elif self._durability == "always":
+                    self._flush_journal()
+                else:
+                    self._schedule_flush()
+            except Exception as e:
+                print(f"Warning: Could not write resource journal: {e}")
+    
+    def _schedule_flush(self):
+        """Flush the journal soon if an event loop is running, otherwise right away."""
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Called from a script or worker thread
+            self._flush_journal()
+            return
+        self._flush_handle = loop.call_later(self._flush_delay, self._flush_journal)
+    
+    def _flush_journal(self):
+        """Write buffered journal entries to disk."""
+        with self._lock:
+            self._flush_handle = None
+            if not self._pending_journal:
+                return
+            try:
+                with self._file_lock():
+                    self._write_pending_journal()
+            except Exception as e:
+                print(f"Warning: Could not flush resource journal: {e}")
     
-    def _cleanup_expired_resources(self):
-        """Remove expired resources."""
-        current_time = datetime.now()
+    def _write_pending_journal(self):
+        """Append buffered entries to the journal; the caller holds the file lock."""
+        if not self._pending_journal:
+            return
+        # One O_APPEND write per flush, so entries from other processes never interleave mid-line
+        view = memoryview(self._pending_journal)
+        written = 0
+        while written < len(view):
+            written += self._journal.write(view[written:])
+        view.release()
+        self._journal_seen += written
+        self._pending_journal.clear()
+        if self._durability != "none":
+            os.fsync(self._journal.fileno())
+    
+    async def flush(self):
+        """Write pending metadata changes to disk now instead of waiting for the debounce."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        self._flush_journal()
+    
+    def close(self):
+        """Flush pending journal entries and release the journal file."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        with self._lock:
+            self._flush_journal()
+            self._journal.close()
+            self._lock_handle.close()
+        _open_managers.discard(self)
+    
+    def _current_snapshot_mtime(self) -> Optional[int]:
+        """Return metadata.json's mtime_ns, or None if there is no snapshot yet."""
+        try:
+            return self._metadata_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+    
+    def _compact(self):
+        """Write a full metadata snapshot and truncate the journal."""
+        with self._lock:
+            try:
+                with self._file_lock():
+                    self._sync_from_disk()
+                    self._write_snapshot()
+            except Exception as e:
+                print(f"Warning: Could not compact resource journal: {e}")
+    
+    def _sync_from_disk(self):
+        """Write buffered entries, then reload if another process changed the files; the caller holds the file lock."""
+        self._write_pending_journal()
+        # Another process appended or compacted since we last read the files;
+        # everything we changed is on disk now, so reload before rewriting
+        if (self._journal_file.stat().st_size != self._journal_seen
+                or self._snapshot_mtime != self._current_snapshot_mtime()):
+            self._read_metadata_files()
+            self._rebuild_indexes()
+            self._read_cache.clear()
+    
+    def _write_snapshot(self):
+        """Replace metadata.json with self.resources and empty the journal; the caller holds the file lock."""
+        if self._save_metadata():
+            self._journal.truncate(0)
+            self._journal_seen = 0
+    
+    def _cleanup_expired_resources(self, force: bool = False) -> int:
+        """Remove expired resources and return how many were deleted."""
+        return len(self.delete_many(self._due_expired_uris(force)))
+    
+    async def _cleanup_expired_resources_async(self) -> int:
+        """Remove expired resources, unlinking their files off the event loop."""
+        # Metadata and indexes are only mutated here on the loop, never on the worker thread
+        removed = self._forget_resources(self._due_expired_uris())
+        if removed:
+            await asyncio.to_thread(self._delete_resource_files, [path for _, path in removed])
+        return len(removed)
+    
+    def _due_expired_uris(self, force: bool = False) -> List[str]:
+        """Pop the expired URIs off the expiry heap, at most once per cleanup interval."""
+        checked_at = time.monotonic()
+        if not force and checked_at - self._last_cleanup < self._cleanup_interval:
+            return []
+        self._last_cleanup = checked_at
+        
+        now = time.time()
         expired_uris = []
         
-        for uri, metadata in self.resources.items():
-            created_time = datetime.fromisoformat(metadata.get("created_at", "1970-01-01T00:00:00"))
-            if current_time - created_time > timedelta(hours=self.expiry_hours):
-                expired_uris.append(uri)
+        # Only the entries that are actually due get popped
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                _, uri = heapq.heappop(self._expiry_heap)
+                metadata = self.resources.get(uri)
+                if metadata is not None and self._expires_at_ts(metadata) <= now:
+                    expired_uris.append(uri)
         
-        for uri in expired_uris:
-            self._delete_resource(uri)
+        return expired_uris
     
     def _delete_resource(self, uri: str):
         """Delete a specific resource."""
-        if uri in self.resources:
-            metadata = self.resources[uri]
-            resource_type = metadata.get("type", "unknown")
-            
-            # Determine the correct file path based on resource type
-            resource_id = uri.split("/")[-1]
-            
-            if resource_type == "schema":
-                # Schema files already have .json extension in the URI
-                resource_file = self.storage_path / f"schemas/{resource_id}"
-            else:
-                # Other resource types need .json added
-                resource_file = self.storage_path / f"{resource_type}s/{resource_id}.json"
-            
-            # Delete the resource file
-            if resource_file.exists():
-                resource_file.unlink()
-                print(f"🗑️  Deleted file: {resource_file}")
-            else:
-                print(f"⚠️  File not found: {resource_file}")
+        self.delete_many([uri])
+    
+    def _resource_path(self, uri: str, resource_type: str) -> Path:
+        """Resolve the data file for a resource URI."""
+        resource_id = uri.rpartition("/")[2]
+        type_dir = self._type_dirs.get(resource_type) or self.storage_path / f"{resource_type}s"
+        
+        # Schema URIs already end in .json; other resource types need it added
+        return type_dir / (resource_id if resource_type == "schema" else f"{resource_id}.json")
+    
+    def _delete_resource_file(self, resource_file: Path):
+        """Delete the stored data file for a resource."""
+        try:
+            resource_file.unlink()
+            logger.debug("🗑️  Deleted file: %s", resource_file)
+        except FileNotFoundError:
+            logger.debug("⚠️  File not found: %s", resource_file)
+    
+    def _delete_resource_files(self, resource_files: List[Path]):
+        """Delete several resource data files."""
+        for resource_file in resource_files:
+            self._delete_resource_file(resource_file)
+    
+    def delete_many(self, uris, rebuild_index: bool = False) -> List[str]:
+        """Delete several resources in one locked batch.
+        
+        Args:
+            uris: URIs of the resources to delete
+            rebuild_index: Rebuild the secondary indexes once at the end instead
+                of updating them per URI (cheaper when deleting most resources)
+        
+        Returns:
+            List[str]: URIs that were actually deleted
+        """
+        with self._lock:
+            removed = self._forget_resources(uris, rebuild_index)
+            self._delete_resource_files([path for _, path in removed])
+        
+        return [uri for uri, _ in removed]
+    
+    def _forget_resources(self, uris, rebuild_index: bool = False) -> List[Tuple[str, Path]]:
+        """Drop resources from metadata, indexes and the journal, returning their URIs and data files."""
+        removed = []
+        with self._lock:
+            for uri in uris:
+                metadata = self.resources.pop(uri, None)
+                if metadata is None:
+                    continue
+                if not rebuild_index:
+                    self._unindex_resource(uri, metadata)
+                self._read_cache.pop(uri, None)
+                self._append_journal("del", uri)
+                removed.append((uri, self._resource_path(uri, metadata.get("type", "unknown"))))
             
-            # Remove from metadata
-            del self.resources[uri]
-            self._save_metadata()
+            if removed and rebuild_index:
+                self._rebuild_indexes()
+        
+        return removed
+    
+    def delete_all(self) -> List[str]:
+        """Delete every stored resource."""
+        deleted = []
+        with self._lock:
+            try:
+                # Held until the empty snapshot is written, so resources another process
+                # stores meanwhile can't be reloaded without their files or left dangling
+                with self._file_lock():
+                    self._sync_from_disk()
+                    deleted = list(self.resources)
+                    for uri, metadata in self.resources.items():
+                        self._delete_resource_file(self._resource_path(uri, metadata.get("type", "unknown")))
+                    
+                    # Drop everything at once rather than popping entries one by one
+                    self.resources.clear()
+                    self._by_type.clear()
+                    self._by_tag.clear()
+                    self._by_category.clear()
+                    self._search_text.clear()
+                    self._by_recency.clear()
+                    self._expiry_heap.clear()
+                    self._content_index.clear()
+                    self._read_cache.clear()
+                    self._list_cache = None
+                    
+                    if deleted:
+                        self._write_snapshot()
+            except Exception as e:
+                print(f"Warning: Could not delete all resources: {e}")
+        
+        return deleted
+    
+    def delete_by_type(self, resource_type: str) -> List[str]:
+        """Delete all resources of the given type using the type index."""
+        return self.delete_many(list(self._by_type.get(resource_type, ())))
+    
+    def count(self, resource_type: str = None) -> int:
+        """Count stored resources, optionally restricted to one type."""
+        if resource_type is None:
+            return len(self.resources)
+        return len(self._by_type.get(resource_type, ()))
     
     async def store_table_resource(self, table_data: Dict[str, Any], sql_query: str, 
                                  name: str = None, description: str = None, 
                                  tags: List[str] = None, category: str = None,
-                                 source_schema: str = None) -> str:
+                                 source_schema: str = None, do_not_cache: bool = False) -> str:
         """Store table data as a resource and return the URI."""
         try:
+            # Serialize once; identical data that is already stored is reused
+            payload = await asyncio.to_thread(_dumps, table_data)
+            content_hash = self._content_hash("table", payload)
+            existing_uri = self._reuse_resource(content_hash, name, description, tags, category,
+                                                source_schema=source_schema)
+            if existing_uri:
+                print(f"📊 Reusing table resource with identical data: {existing_uri}")
+                return existing_uri
+            
             # Generate unique URI
             resource_id = str(uuid.uuid4())
             uri = f"resource://tables/{resource_id}"
@@ -119,15 +759,20 @@ class ResourceManager:
             )
             
             # Store the resource data
-            resource_file = self.storage_path / f"tables/{resource_id}.json"
-            resource_file.parent.mkdir(exist_ok=True)
-            
-            with open(resource_file, 'w') as f:
-                json.dump(table_data, f, indent=2, default=str)
+            resource_file = self._resource_path(uri, "table")
+            mtime_ns = await asyncio.to_thread(self._write_bytes, resource_file, payload)
+            if do_not_cache:
+                # One-off results shouldn't push hot resources out of the read cache
+                metadata["do_not_cache"] = True
+            else:
+                self._cache_stored(uri, "table", mtime_ns, table_data, payload)
             
             # Update metadata
+            metadata["content_hash"] = content_hash
+            metadata["byte_size"] = len(payload)
             self.resources[uri] = metadata
-            self._save_metadata()
+            self._index_resource(uri, metadata)
+            self._append_journal("put", uri, metadata)
             
             print(f"📊 Stored enhanced table resource: {metadata['name']} (tags: {', '.join(metadata['tags'])})")
             return uri
@@ -141,6 +786,14 @@ class ResourceManager:
                                  tags: List[str] = None, category: str = None) -> str:
         """Store chart data as a resource and return the URI."""
         try:
+            # Serialize once; identical data that is already stored is reused
+            payload = await asyncio.to_thread(_dumps, chart_data)
+            content_hash = self._content_hash("chart", payload)
+            existing_uri = self._reuse_resource(content_hash, name, description, tags, category)
+            if existing_uri:
+                print(f"📈 Reusing chart resource with identical data: {existing_uri}")
+                return existing_uri
+            
             # Generate unique URI
             resource_id = str(uuid.uuid4())
             uri = f"resource://charts/{resource_id}"
@@ -163,15 +816,16 @@ class ResourceManager:
             )
             
             # Store the resource data
-            resource_file = self.storage_path / f"charts/{resource_id}.json"
-            resource_file.parent.mkdir(exist_ok=True)
-            
-            with open(resource_file, 'w') as f:
-                json.dump(chart_data, f, indent=2, default=str)
+            resource_file = self._resource_path(uri, "chart")
+            mtime_ns = await asyncio.to_thread(self._write_bytes, resource_file, payload)
+            self._cache_stored(uri, "chart", mtime_ns, chart_data, payload)
             
             # Update metadata
+            metadata["content_hash"] = content_hash
+            metadata["byte_size"] = len(payload)
             self.resources[uri] = metadata
-            self._save_metadata()
+            self._index_resource(uri, metadata)
+            self._append_journal("put", uri, metadata)
             
             print(f"📈 Stored enhanced chart resource: {metadata['name']} (tags: {', '.join(metadata['tags'])})")
             return uri
@@ -185,6 +839,14 @@ class ResourceManager:
                               tags: List[str] = None, category: str = None) -> str:
         """Store ML results as a resource and return the URI."""
         try:
+            # Serialize once; identical data that is already stored is reused
+            payload = await asyncio.to_thread(_dumps, ml_data)
+            content_hash = self._content_hash("ml", payload)
+            existing_uri = self._reuse_resource(content_hash, name, description, tags, category)
+            if existing_uri:
+                print(f"🤖 Reusing ML resource with identical data: {existing_uri}")
+                return existing_uri
+            
             # Generate unique URI
             resource_id = str(uuid.uuid4())
             uri = f"resource://ml/{resource_id}"
@@ -207,15 +869,16 @@ class ResourceManager:
             )
             
             # Store the resource data
-            resource_file = self.storage_path / f"ml/{resource_id}.json"
-            resource_file.parent.mkdir(exist_ok=True)
-            
-            with open(resource_file, 'w') as f:
-                json.dump(ml_data, f, indent=2, default=str)
+            resource_file = self._resource_path(uri, "ml")
+            mtime_ns = await asyncio.to_thread(self._write_bytes, resource_file, payload)
+            self._cache_stored(uri, "ml", mtime_ns, ml_data, payload)
             
             # Update metadata
+            metadata["content_hash"] = content_hash
+            metadata["byte_size"] = len(payload)
             self.resources[uri] = metadata
-            self._save_metadata()
+            self._index_resource(uri, metadata)
+            self._append_journal("put", uri, metadata)
             
             print(f"🤖 Stored enhanced ML resource: {metadata['name']} (tags: {', '.join(metadata['tags'])})")
             return uri
@@ -264,15 +927,20 @@ class ResourceManager:
             )
             
             # Store the schema data
-            resource_file = self.storage_path / f"schemas/{internal_uri.split('/')[-1]}"
-            resource_file.parent.mkdir(exist_ok=True)
-            
-            with open(resource_file, 'w') as f:
-                json.dump(schema_data, f, indent=2, default=str)
+            resource_file = self._resource_path(internal_uri, "schema")
+            payload = await asyncio.to_thread(_dumps, schema_data)
+            mtime_ns = await asyncio.to_thread(self._write_bytes, resource_file, payload)
+            self._cache_stored(internal_uri, "schema", mtime_ns, schema_data, payload)
             
             # Update metadata
+            metadata["byte_size"] = len(payload)
+            # Re-storing a schema URI replaces it, so its old tags/category leave the indexes
+            previous = self.resources.get(internal_uri)
+            if previous is not None:
+                self._unindex_resource(internal_uri, previous)
             self.resources[internal_uri] = metadata
-            self._save_metadata()
+            self._index_resource(internal_uri, metadata)
+            self._append_journal("put", internal_uri, metadata)
             
             print(f"🗄️ Stored enhanced schema resource: {metadata['name']} (tags: {', '.join(metadata['tags'])})")
             return internal_uri
@@ -284,40 +952,95 @@ class ResourceManager:
     async def list_resources(self) -> List[Resource]:
         """List all available resources."""
         try:
-            print(f"🔍 Listing resources. Current resources count: {len(self.resources)}")
+            logger.debug("🔍 Listing resources. Current resources count: %d", len(self.resources))
             
-            # Cleanup expired resources first
-            self._cleanup_expired_resources()
+            # Cleanup expired resources first; unlinking their files happens off the event loop
+            await self._cleanup_expired_resources_async()
             
-            print(f"🔍 After cleanup. Resources count: {len(self.resources)}")
+            logger.debug("🔍 After cleanup. Resources count: %d", len(self.resources))
             
-            resources = []
-            for uri, metadata in self.resources.items():
-                print(f"🔍 Processing resource: {uri}")
-                # Use enhanced metadata for better descriptions
-                name = metadata.get("name", metadata.get("type", "unknown"))
-                description = metadata.get("description", f"{metadata.get('type', 'Unknown')} resource")
-                tags = metadata.get("tags", [])
-                category = metadata.get("category", "general")
-                
-                # Create enhanced description with tags and category
-                enhanced_description = f"{description} | Category: {category} | Tags: {', '.join(tags)}"
-                
-                resource = Resource(
-                    uri=uri,
-                    name=name,
-                    description=enhanced_description,
-                    mimeType="application/json"
-                )
-                resources.append(resource)
-            
-            print(f"🔍 Returning {len(resources)} resources")
+            # Nothing was added or removed since the last listing
+            if self._list_cache is not None:
+                logger.debug("🔍 Returning %d cached resources", len(self._list_cache))
+                return self._list_cache
+            
+            resources = self._build_resource_list(self.resources.items())
+            
+            self._list_cache = resources
+            logger.debug("🔍 Returning %d resources", len(resources))
             return resources
             
         except Exception as e:
             print(f"Error listing resources: {e}")
             return []
     
+    async def list_resources_by_type(self, resource_type: str) -> List[Resource]:
+        """List resources of one type using the type index."""
+        await self._cleanup_expired_resources_async()
+        return self._build_resource_list(self._indexed_items(self._by_type.get(resource_type, ())))
+    
+    async def list_resources_by_tag(self, tag: str) -> List[Resource]:
+        """List resources carrying a tag using the tag index."""
+        await self._cleanup_expired_resources_async()
+        return self._build_resource_list(self._indexed_items(self._by_tag.get(tag, ())))
+    
+    def candidate_uris(self, tags: List[str] = None, any_tags: List[str] = None,
+                       category: str = None, resource_type: str = None) -> Optional[Set[str]]:
+        """URIs that can satisfy the given tag/category/type filters, or None if none were given."""
+        with self._lock:
+            postings = [self._by_tag.get(tag, set()) for tag in tags or ()]
+            if any_tags:
+                postings.append(set().union(*(self._by_tag.get(tag, ()) for tag in any_tags)))
+            if category:
+                postings.append(self._by_category.get(category, set()))
+            if resource_type:
+                postings.append(self._by_type.get(resource_type, set()))
+            if not postings:
+                return None
+            
+            # Intersect starting from the most selective posting list
+            postings.sort(key=len)
+            return postings[0].intersection(*postings[1:])
+    
+    def most_recent(self, limit: int = 0) -> List[Tuple[str, Dict[str, Any]]]:
+        """(uri, metadata) pairs newest first, at most `limit` of them when limit > 0."""
+        with self._lock:
+            uris = reversed(self._by_recency)
+            if limit > 0:
+                uris = islice(uris, limit)
+            return [(uri, self.resources[uri]) for uri in uris]
+    
+    def search_text(self, uri: str) -> Tuple[str, frozenset]:
+        """Normalized search text and words for a resource."""
+        cached = self._search_text.get(uri)
+        if cached is None:
+            cached = _search_text(self.resources[uri])
+        return cached
+    
+    def _indexed_items(self, uris: Set[str]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Resolve indexed URIs to (uri, metadata) pairs, oldest first."""
+        with self._lock:
+            items = [(uri, self.resources[uri]) for uri in uris if uri in self.resources]
+        items.sort(key=lambda item: item[1].get("created_at_ts", 0.0))
+        return items
+    
+    def _build_resource_list(self, items) -> List[Resource]:
+        """Build MCP Resource entries from (uri, metadata) pairs."""
+        # Use enhanced metadata for better descriptions, with tags and category appended
+        return [
+            Resource(
+                uri=uri,
+                name=metadata.get("name") or metadata.get("type") or "unknown",
+                description=(
+                    f"{metadata.get('description') or metadata.get('type', 'Unknown') + ' resource'}"
+                    f" | Category: {metadata.get('category', 'general')}"
+                    f" | Tags: {', '.join(metadata.get('tags', []))}"
+                ),
+                mimeType="application/json"
+            )
+            for uri, metadata in items
+        ]
+    
     async def read_resource(self, uri: str, raw: bool = False) -> List[TextContent | ImageContent | EmbeddedResource]:
         """Read a specific resource."""
         try:
@@ -330,37 +1053,54 @@ class ResourceManager:
             # Update access tracking
             metadata["access_count"] = metadata.get("access_count", 0) + 1
             metadata["last_accessed"] = datetime.now().isoformat()
-            self._save_metadata()
+            self._append_journal("put", uri, metadata)
             
-            # Determine the file path
-            resource_id = uri.split("/")[-1]
+            resource_file = self._resource_path(uri, resource_type)
             
-            # Handle different resource types
-            if resource_type == "schema":
-                # Schema files already have .json extension
-                resource_file = self.storage_path / f"schemas/{resource_id}"
-            else:
-                # Other resource types need .json added
-                resource_file = self.storage_path / f"{resource_type}s/{resource_id}.json"
-            
-            if not resource_file.exists():
+            try:
+                file_stat = await asyncio.to_thread(resource_file.stat)
+            except FileNotFoundError:
                 return [TextContent(type="text", text=f"Resource file not found: {uri} (path: {resource_file})")]
+            mtime_ns = file_stat.st_mtime_ns
             
-            # Read the resource data
-            with open(resource_file, 'r') as f:
-                data = json.load(f)
+            # Reuse the parsed data while the file is unchanged
+            cacheable = not metadata.get("do_not_cache")
+            cached = self._read_cache.get(uri) if cacheable else None
+            if cached is not None and cached[0] == mtime_ns:
+                self._read_cache.move_to_end(uri)
+                _, data, raw_text = cached
+            else:
+                # A large table only shows a few sample rows, so parse just those
+                # (the partial result isn't cached)
+                if not raw and resource_type == "table" and file_stat.st_size > _TABLE_PREVIEW_MIN_BYTES:
+                    preview = await asyncio.to_thread(_read_table_preview, resource_file)
+                    if preview is not None:
+                        rows, total_rows = preview
+                        response = self._format_table_resource({"data": rows}, metadata, total_rows)
+                        return [TextContent(type="text", text=response)]
+                
+                raw_bytes, data = await asyncio.to_thread(self._read_resource_file, resource_file)
+                # Files are stored indented, so the on-disk text doubles as the raw
+                # response and the embedded chart/ML JSON; tables only need the data
+                keep_text = raw or resource_type in ("chart", "ml")
+                raw_text = raw_bytes.decode() if keep_text else None
             
             # If raw is requested, return the JSON data directly
+            if raw and raw_text is None:
+                raw_text = (await asyncio.to_thread(_dumps, data)).decode()
+            if cacheable:
+                self._cache_read(uri, mtime_ns, data, raw_text)
+            
             if raw:
-                return [TextContent(type="text", text=json.dumps(data, indent=2))]
+                return [TextContent(type="text", text=raw_text)]
             
             # Format the response based on resource type
             if resource_type == "table":
                 response = self._format_table_resource(data, metadata)
             elif resource_type == "chart":
-                response = self._format_chart_resource(data, metadata)
+                response = self._format_chart_resource(data, metadata, raw_text)
             elif resource_type == "ml":
-                response = self._format_ml_resource(data, metadata)
+                response = self._format_ml_resource(data, metadata, raw_text)
             elif resource_type == "schema":
                 response = self._format_schema_resource(data, metadata)
             else:
@@ -371,113 +1111,126 @@ class ResourceManager:
         except Exception as e:
             return [TextContent(type="text", text=f"Error reading resource: {str(e)}")]
     
-    def _format_table_resource(self, data: Dict[str, Any], metadata: Dict[str, Any]) -> str:
+    def _cache_read(self, uri: str, mtime_ns: int, data: Any, raw_text: Optional[str]):
+        """Insert or refresh a read cache entry, evicting the least recently used."""
+        self._read_cache[uri] = (mtime_ns, data, raw_text)
+        self._read_cache.move_to_end(uri)
+        while len(self._read_cache) > self._read_cache_size:
+            self._read_cache.popitem(last=False)
+    
+    def _embedded_json(self, data: Any, raw_text: Optional[str]) -> str:
+        """JSON text to embed in a markdown response, capped at _MAX_EMBEDDED_JSON_CHARS."""
+        text = raw_text if raw_text is not None else _dumps(data).decode()
+        if len(text) <= _MAX_EMBEDDED_JSON_CHARS:
+            return text
+        return f"{text[:_MAX_EMBEDDED_JSON_CHARS]}\n... (truncated, {len(text)} characters total; use raw=True for the full data)"
+    
+    def _cache_stored(self, uri: str, resource_type: str, mtime_ns: int, data: Any, payload: bytes):
+        """Seed the read cache with freshly written data so the first read skips the disk."""
+        # Keep the text only where read_resource would (chart/ML embed it verbatim)
+        raw_text = payload.decode() if resource_type in ("chart", "ml") else None
+        self._cache_read(uri, mtime_ns, data, raw_text)
+    
+    def _display_fields(self, metadata: Dict[str, Any], default_name: str) -> Tuple:
+        """Pull the fields shared by every formatted resource header in one pass."""
+        get = metadata.get
+        return (
+            get("name", default_name),
+            get("description", "No description available"),
+            get("tags", []),
+            get("category", "general"),
+            get("access_count", 0),
+            get("last_accessed", "Never"),
+            get("metadata", {})
+        )
+    
+    def _format_table_resource(self, data: Dict[str, Any], metadata: Dict[str, Any], total_rows: int = None) -> str:
         """Format table resource for display."""
-        # Get enhanced metadata
-        name = metadata.get("name", "Unknown Table")
-        description = metadata.get("description", "No description available")
-        tags = metadata.get("tags", [])
-        category = metadata.get("category", "general")
-        access_count = metadata.get("access_count", 0)
-        last_accessed = metadata.get("last_accessed", "Never")
-        
-        # Get type-specific metadata
-        type_metadata = metadata.get("metadata", {})
+        # Get enhanced and type-specific metadata
+        name, description, tags, category, access_count, last_accessed, type_metadata = \
+            self._display_fields(metadata, "Unknown Table")
         sql_query = type_metadata.get("sql_query", "Unknown")
         columns = type_metadata.get("columns", [])
         row_count = type_metadata.get("row_count", 0)
         source_schema = type_metadata.get("source_schema", "None")
         
         rows = data.get("data", [])
+        if total_rows is None:
+            total_rows = len(rows)
         
-        # Create a formatted table
-        formatted = f"# {name}\n\n"
-        formatted += f"**Description:** {description}\n\n"
-        formatted += f"**Category:** {category}\n\n"
-        formatted += f"**Tags:** {', '.join(tags)}\n\n"
-        formatted += f"**Access Count:** {access_count}\n\n"
-        formatted += f"**Last Accessed:** {last_accessed}\n\n"
-        formatted += f"**Source Schema:** {source_schema}\n\n"
-        formatted += f"**SQL Query:** `{sql_query}`\n\n"
-        formatted += f"**Columns:** {', '.join(columns)}\n\n"
-        formatted += f"**Row Count:** {row_count}\n\n"
+        # Create a formatted table; collect the pieces and join once at the end
+        parts = [
+            f"# {name}\n\n",
+            f"**Description:** {description}\n\n",
+            f"**Category:** {category}\n\n",
+            f"**Tags:** {', '.join(tags)}\n\n",
+            f"**Access Count:** {access_count}\n\n",
+            f"**Last Accessed:** {last_accessed}\n\n",
+            f"**Source Schema:** {source_schema}\n\n",
+            f"**SQL Query:** `{sql_query}`\n\n",
+            f"**Columns:** {', '.join(columns)}\n\n",
+            f"**Row Count:** {row_count}\n\n"
+        ]
         
         if rows:
             # Show first few rows as example
-            formatted += "**Sample Data:**\n"
-            formatted += "| " + " | ".join(columns) + " |\n"
-            formatted += "| " + " | ".join(["---"] * len(columns)) + " |\n"
+            parts.append("**Sample Data:**\n")
+            parts.append("| " + " | ".join(columns) + " |\n")
+            parts.append("| " + " | ".join(["---"] * len(columns)) + " |\n")
             
             for row in rows[:5]:  # Show first 5 rows
-                formatted += "| " + " | ".join([str(row.get(col, "")) for col in columns]) + " |\n"
+                parts.append("| " + " | ".join(str(row.get(col, "")) for col in columns) + " |\n")
             
-            if len(rows) > 5:
-                formatted += f"\n*... and {len(rows) - 5} more rows*\n"
+            if total_rows > 5:
+                parts.append(f"\n*... and {total_rows - 5} more rows*\n")
         
-        return formatted
+        return "".join(parts)
     
-    def _format_chart_resource(self, data: Dict[str, Any], metadata: Dict[str, Any]) -> str:
+    def _format_chart_resource(self, data: Dict[str, Any], metadata: Dict[str, Any], raw_text: str = None) -> str:
         """Format chart resource for display."""
-        # Get enhanced metadata
-        name = metadata.get("name", "Unknown Chart")
-        description = metadata.get("description", "No description available")
-        tags = metadata.get("tags", [])
-        category = metadata.get("category", "general")
-        access_count = metadata.get("access_count", 0)
-        last_accessed = metadata.get("last_accessed", "Never")
-        
-        # Get type-specific metadata
-        type_metadata = metadata.get("metadata", {})
+        # Get enhanced and type-specific metadata
+        name, description, tags, category, access_count, last_accessed, type_metadata = \
+            self._display_fields(metadata, "Unknown Chart")
         chart_type = type_metadata.get("chart_type", "unknown")
         
-        formatted = f"# {name}\n\n"
-        formatted += f"**Description:** {description}\n\n"
-        formatted += f"**Category:** {category}\n\n"
-        formatted += f"**Tags:** {', '.join(tags)}\n\n"
-        formatted += f"**Access Count:** {access_count}\n\n"
-        formatted += f"**Last Accessed:** {last_accessed}\n\n"
-        formatted += f"**Chart Type:** {chart_type}\n\n"
-        formatted += f"**Chart Data:**\n```json\n{json.dumps(data, indent=2)}\n```\n"
+        parts = [
+            f"# {name}\n\n",
+            f"**Description:** {description}\n\n",
+            f"**Category:** {category}\n\n",
+            f"**Tags:** {', '.join(tags)}\n\n",
+            f"**Access Count:** {access_count}\n\n",
+            f"**Last Accessed:** {last_accessed}\n\n",
+            f"**Chart Type:** {chart_type}\n\n",
+            f"**Chart Data:**\n```json\n{self._embedded_json(data, raw_text)}\n```\n"
+        ]
         
-        return formatted
+        return "".join(parts)
     
-    def _format_ml_resource(self, data: Dict[str, Any], metadata: Dict[str, Any]) -> str:
+    def _format_ml_resource(self, data: Dict[str, Any], metadata: Dict[str, Any], raw_text: str = None) -> str:
         """Format ML resource for display."""
-        # Get enhanced metadata
-        name = metadata.get("name", "Unknown ML Resource")
-        description = metadata.get("description", "No description available")
-        tags = metadata.get("tags", [])
-        category = metadata.get("category", "general")
-        access_count = metadata.get("access_count", 0)
-        last_accessed = metadata.get("last_accessed", "Never")
-        
-        # Get type-specific metadata
-        type_metadata = metadata.get("metadata", {})
+        # Get enhanced and type-specific metadata
+        name, description, tags, category, access_count, last_accessed, type_metadata = \
+            self._display_fields(metadata, "Unknown ML Resource")
         ml_type = type_metadata.get("ml_type", "unknown")
         
-        formatted = f"# {name}\n\n"
-        formatted += f"**Description:** {description}\n\n"
-        formatted += f"**Category:** {category}\n\n"
-        formatted += f"**Tags:** {', '.join(tags)}\n\n"
-        formatted += f"**Access Count:** {access_count}\n\n"
-        formatted += f"**Last Accessed:** {last_accessed}\n\n"
-        formatted += f"**ML Type:** {ml_type}\n\n"
-        formatted += f"**Results:**\n```json\n{json.dumps(data, indent=2)}\n```\n"
+        parts = [
+            f"# {name}\n\n",
+            f"**Description:** {description}\n\n",
+            f"**Category:** {category}\n\n",
+            f"**Tags:** {', '.join(tags)}\n\n",
+            f"**Access Count:** {access_count}\n\n",
+            f"**Last Accessed:** {last_accessed}\n\n",
+            f"**ML Type:** {ml_type}\n\n",
+            f"**Results:**\n```json\n{self._embedded_json(data, raw_text)}\n```\n"
+        ]
         
-        return formatted
+        return "".join(parts)
     
     def _format_schema_resource(self, data: Dict[str, Any], metadata: Dict[str, Any]) -> str:
         """Format schema resource for display."""
-        # Get enhanced metadata
-        name = metadata.get("name", "Unknown Schema")
-        description = metadata.get("description", "No description available")
-        tags = metadata.get("tags", [])
-        category = metadata.get("category", "general")
-        access_count = metadata.get("access_count", 0)
-        last_accessed = metadata.get("last_accessed", "Never")
-        
-        # Get type-specific metadata
-        type_metadata = metadata.get("metadata", {})
+        # Get enhanced and type-specific metadata
+        name, description, tags, category, access_count, last_accessed, type_metadata = \
+            self._display_fields(metadata, "Unknown Schema")
         database_type = type_metadata.get("database_type", "unknown")
         table_count = type_metadata.get("table_count", 0)
         connection_string = type_metadata.get("connection_string", "N/A")
@@ -485,67 +1238,50 @@ class ResourceManager:
         tables = data.get("tables", {})
         relationships = data.get("relationships", [])
         
-        formatted = f"# {name}\n\n"
-        formatted += f"**Description:** {description}\n\n"
-        formatted += f"**Category:** {category}\n\n"
-        formatted += f"**Tags:** {', '.join(tags)}\n\n"
-        formatted += f"**Access Count:** {access_count}\n\n"
-        formatted += f"**Last Accessed:** {last_accessed}\n\n"
-        formatted += f"**Database Type:** {database_type}\n\n"
-        formatted += f"**Connection String:** {connection_string}\n\n"
-        formatted += f"**Tables:** {table_count}\n\n"
+        parts = [
+            f"# {name}\n\n",
+            f"**Description:** {description}\n\n",
+            f"**Category:** {category}\n\n",
+            f"**Tags:** {', '.join(tags)}\n\n",
+            f"**Access Count:** {access_count}\n\n",
+            f"**Last Accessed:** {last_accessed}\n\n",
+            f"**Database Type:** {database_type}\n\n",
+            f"**Connection String:** {connection_string}\n\n",
+            f"**Tables:** {table_count}\n\n"
+        ]
         
         # Show table information
         for table_name, table_info in tables.items():
-            formatted += f"## Table: {table_name}\n\n"
+            parts.append(f"## Table: {table_name}\n\n")
             
             # Columns
             columns = table_info.get("columns", [])
-            formatted += "**Columns:**\n"
+            parts.append("**Columns:**\n")
             for col in columns:
                 pk_marker = " (PRIMARY KEY)" if col.get("primary_key") else ""
-                formatted += f"- {col['name']}: {col['type']}{pk_marker}\n"
+                parts.append(f"- {col['name']}: {col['type']}{pk_marker}\n")
             
             # Foreign keys
             foreign_keys = table_info.get("foreign_keys", [])
             if foreign_keys:
-                formatted += "\n**Foreign Keys:**\n"
+                parts.append("\n**Foreign Keys:**\n")
                 for fk in foreign_keys:
-                    formatted += f"- {fk['column']} -> {fk['references_table']}.{fk['references_column']}\n"
+                    parts.append(f"- {fk['column']} -> {fk['references_table']}.{fk['references_column']}\n")
             
-            formatted += "\n"
+            parts.append("\n")
         
         # Show relationships
         if relationships:
-            formatted += "## Table Relationships\n\n"
+            parts.append("## Table Relationships\n\n")
             for rel in relationships:
-                formatted += f"- {rel['table']}.{rel['column']} -> {rel['references']}\n"
+                parts.append(f"- {rel['table']}.{rel['column']} -> {rel['references']}\n")
         
-        return formatted
+        return "".join(parts)
     
     def _generate_resource_name(self, resource_type: str, content: Dict[str, Any]) -> str:
         """Auto-generate a human-readable name for a resource."""
         if resource_type == "table":
-            sql_query = content.get("sql_query", "")
-            if sql_query:
-                # Extract table name or create descriptive name from SQL
-                if "FROM" in sql_query.upper():
-                    # Try to extract table name
-                    match = re.search(r'FROM\s+(\w+)', sql_query, re.IGNORECASE)
-                    if match:
-                        table_name = match.group(1)
-                        return f"{table_name.title()} Query Results"
-                
-                # Create name from query type
-                if "SELECT" in sql_query.upper():
-                    if "COUNT" in sql_query.upper():
-                        return "Count Query Results"
-                    elif "SUM" in sql_query.upper() or "AVG" in sql_query.upper():
-                        return "Aggregation Query Results"
-                    else:
-                        return "Data Query Results"
-            
-            return "Table Resource"
+            return _table_resource_name(content.get("sql_query", ""))
         
         elif resource_type == "schema":
             db_type = content.get("database_type", "unknown")
@@ -565,35 +1301,17 @@ class ResourceManager:
     def _generate_resource_description(self, resource_type: str, content: Dict[str, Any]) -> str:
         """Auto-generate a description for a resource."""
         if resource_type == "table":
-            sql_query = content.get("sql_query", "")
-            row_count = content.get("row_count", 0)
-            columns = content.get("columns", [])
-            
-            desc = f"Query results with {row_count} rows"
-            if columns:
-                desc += f" and {len(columns)} columns: {', '.join(columns[:3])}"
-                if len(columns) > 3:
-                    desc += f" and {len(columns) - 3} more"
-            
-            if sql_query:
-                desc += f". Generated from SQL: {sql_query[:100]}"
-                if len(sql_query) > 100:
-                    desc += "..."
-            
-            return desc
+            return _table_resource_description(
+                content.get("sql_query", ""),
+                content.get("row_count", 0),
+                tuple(content.get("columns", []))
+            )
         
         elif resource_type == "schema":
-            db_type = content.get("database_type", "unknown")
-            tables = content.get("tables", {})
-            table_names = list(tables.keys())[:3]
-            
-            desc = f"{db_type.title()} database schema with {len(tables)} tables"
-            if table_names:
-                desc += f" including: {', '.join(table_names)}"
-                if len(tables) > 3:
-                    desc += f" and {len(tables) - 3} more"
-            
-            return desc
+            return _schema_resource_description(
+                content.get("database_type", "unknown"),
+                tuple(content.get("tables", {}))
+            )
         
         elif resource_type == "chart":
             chart_type = content.get("chart_type", "unknown")
@@ -607,41 +1325,13 @@ class ResourceManager:
     
     def _generate_resource_tags(self, resource_type: str, content: Dict[str, Any]) -> List[str]:
         """Auto-generate tags for a resource."""
-        tags = [resource_type]
-        
         if resource_type == "table":
-            sql_query = content.get("sql_query", "").lower()
-            columns = [col.lower() for col in content.get("columns", [])]
-            
-            # Add tags based on SQL keywords
-            if "select" in sql_query:
-                tags.append("query")
-            if "join" in sql_query:
-                tags.append("join")
-            if "group by" in sql_query:
-                tags.append("aggregation")
-            if "order by" in sql_query:
-                tags.append("sorted")
-            if "limit" in sql_query:
-                tags.append("limited")
-            
-            # Add tags based on column names
-            for col in columns:
-                if "id" in col:
-                    tags.append("identifier")
-                if "name" in col:
-                    tags.append("name")
-                if "date" in col or "time" in col:
-                    tags.append("temporal")
-                if "amount" in col or "price" in col or "cost" in col:
-                    tags.append("financial")
-                if "count" in col or "total" in col:
-                    tags.append("metrics")
-            
-            # Remove duplicates
-            tags = list(set(tags))
+            # Cached as an immutable tuple; callers get their own list
+            return list(_table_resource_tags(content.get("sql_query", ""), tuple(content.get("columns", []))))
         
-        elif resource_type == "schema":
+        tags = [resource_type]
+        
+        if resource_type == "schema":
             db_type = content.get("database_type", "unknown")
             tags.append(db_type)
             tags.append("schema")
@@ -687,6 +1377,9 @@ class ResourceManager:
         tags = custom_tags or self._generate_resource_tags(resource_type, content)
         category = custom_category or self._determine_resource_category(resource_type, content)
         
+        # Derive every timestamp from a single clock read
+        now = datetime.now()
+        
         # Create enhanced metadata structure
         metadata = {
             "uri": uri,
@@ -695,8 +1388,9 @@ class ResourceManager:
             "description": description,
             "tags": tags,
             "category": category,
-            "created_at": datetime.now().isoformat(),
-            "expires_at": (datetime.now() + timedelta(hours=self.expiry_hours)).isoformat(),
+            "created_at": now.isoformat(),
+            "created_at_ts": now.timestamp(),
+            "expires_at": (now + self._expiry_delta).isoformat(),
             "access_count": 0,
             "last_accessed": None,
             "metadata": {
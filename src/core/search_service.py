@@ -3,82 +3,104 @@ Search Service for the MCP server.
 Provides advanced search and filtering capabilities for resources with enhanced metadata.
 """
 
+import heapq
 import re
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from difflib import SequenceMatcher
 
+# Number of query words whose similarity verdicts are kept between searches
+_SIMILARITY_CACHE_SIZE = 128
+
+# Search arguments echoed back in search_criteria, with the test for including each
+_CRITERIA_SPEC = (
+    ("query", bool),
+    ("tags", bool),
+    ("any_tags", bool),
+    ("category", bool),
+    ("resource_type", bool),
+    ("created_after", bool),
+    ("created_before", bool),
+    ("min_access_count", lambda value: value > 0),
+    ("exact_only", bool),
+)
+
+# Fields a result can be projected to, with their defaults for missing metadata
+_RESULT_DEFAULTS = {
+    "name": "Unknown",
+    "description": "",
+    "tags": [],
+    "category": "general",
+    "type": "unknown",
+    "created_at": "",
+    "access_count": 0,
+    "last_accessed": "",
+}
+
 class SearchService:
     """Advanced search service for resources with enhanced metadata."""
     
     def __init__(self, resource_manager):
         self.resource_manager = resource_manager
+        
+        # (query word, threshold) -> {text word: similar?}; a verdict depends only on
+        # the two words, so it stays valid as resources come and go
+        self._similarity_cache: "OrderedDict[tuple, Dict[str, bool]]" = OrderedDict()
     
     def search_resources(self, query: str = None, tags: List[str] = None, 
                         any_tags: List[str] = None, category: str = None,
                         resource_type: str = None, created_after: str = None,
                         created_before: str = None, min_access_count: int = 0,
                         limit: int = 50, sort_by: str = "created_at", 
-                        sort_order: str = "desc") -> Dict[str, Any]:
-        """Search resources using various criteria."""
+                        sort_order: str = "desc", exact_only: bool = False,
+                        fields: Optional[Tuple[str, ...]] = None) -> Dict[str, Any]:
+        """Search resources using various criteria.
+        
+        fields limits each result to "uri" plus the named keys; None returns them all.
+        """
         try:
-            # Get all resources
+            # Narrow to resources the tag/category/type indexes say can match
             all_resources = self.resource_manager.resources
+            candidate_uris = self.resource_manager.candidate_uris(tags, any_tags, category, resource_type)
+            if candidate_uris is None:
+                candidates = list(all_resources.items())
+            else:
+                # Only the candidates are visited; ordering them by creation keeps results
+                # tied on the sort key in store order
+                candidates = self.resource_manager._indexed_items(candidate_uris)
             
-            # Apply filters
+            # Apply filters; fuzzy verdicts per word are shared across resources
             filtered_resources = []
+            word_cache = {}
+            date_range = (self._parse_date_bound(created_after), self._parse_date_bound(created_before))
             
-            for uri, metadata in all_resources.items():
-                if self._matches_criteria(metadata, query, tags, any_tags, category,
+            # Tag filters are fully answered by the posting-list intersection and union
+            # above, so candidates aren't re-checked tag by tag
+            for uri, metadata in candidates:
+                if self._matches_criteria(uri, metadata, query, category,
                                         resource_type, created_after, created_before,
-                                        min_access_count):
+                                        min_access_count, word_cache, exact_only, date_range):
                     filtered_resources.append({
                         "uri": uri,
                         "metadata": metadata
                     })
             
             # Sort results
-            filtered_resources = self._sort_results(filtered_resources, sort_by, sort_order)
+            filtered_resources = self._sort_results(filtered_resources, sort_by, sort_order, limit)
             
             # Apply limit
             if limit > 0:
                 filtered_resources = filtered_resources[:limit]
             
             # Format results
-            results = []
-            for item in filtered_resources:
-                metadata = item["metadata"]
-                results.append({
-                    "uri": item["uri"],
-                    "name": metadata.get("name", "Unknown"),
-                    "description": metadata.get("description", ""),
-                    "tags": metadata.get("tags", []),
-                    "category": metadata.get("category", "general"),
-                    "type": metadata.get("type", "unknown"),
-                    "created_at": metadata.get("created_at", ""),
-                    "access_count": metadata.get("access_count", 0),
-                    "last_accessed": metadata.get("last_accessed", ""),
-                    "search_score": item.get("search_score", 0)
-                })
+            results = [self._format_result(item["uri"], item["metadata"], fields)
+                       for item in filtered_resources]
             
             # Build search criteria summary
-            search_criteria = {}
-            if query:
-                search_criteria["query"] = query
-            if tags:
-                search_criteria["tags"] = tags
-            if any_tags:
-                search_criteria["any_tags"] = any_tags
-            if category:
-                search_criteria["category"] = category
-            if resource_type:
-                search_criteria["resource_type"] = resource_type
-            if created_after:
-                search_criteria["created_after"] = created_after
-            if created_before:
-                search_criteria["created_before"] = created_before
-            if min_access_count > 0:
-                search_criteria["min_access_count"] = min_access_count
+            values = (query, tags, any_tags, category, resource_type, created_after,
+                      created_before, min_access_count, exact_only)
+            search_criteria = {name: value for (name, keep), value in zip(_CRITERIA_SPEC, values) if keep(value)}
             
             return {
                 "results": results,
@@ -96,28 +118,39 @@ class SearchService:
                 "error": str(e)
             }
     
-    def _matches_criteria(self, metadata: Dict[str, Any], query: str = None,
-                         tags: List[str] = None, any_tags: List[str] = None,
+    def _format_result(self, uri: str, metadata: Dict[str, Any],
+                       fields: Optional[Tuple[str, ...]] = None) -> Dict[str, Any]:
+        """Build the result entry for a matched resource, optionally only the given fields."""
+        if fields is not None:
+            result = {"uri": uri}
+            for field in fields:
+                if field in _RESULT_DEFAULTS:
+                    result[field] = metadata.get(field, _RESULT_DEFAULTS[field])
+            return result
+        
+        return {
+            "uri": uri,
+            "name": metadata.get("name", "Unknown"),
+            "description": metadata.get("description", ""),
+            "tags": metadata.get("tags", []),
+            "category": metadata.get("category", "general"),
+            "type": metadata.get("type", "unknown"),
+            "created_at": metadata.get("created_at", ""),
+            "access_count": metadata.get("access_count", 0),
+            "last_accessed": metadata.get("last_accessed", "")
+        }
+    
+    def _matches_criteria(self, uri: str, metadata: Dict[str, Any], query: str = None,
                          category: str = None, resource_type: str = None,
                          created_after: str = None, created_before: str = None,
-                         min_access_count: int = 0) -> bool:
+                         min_access_count: int = 0, word_cache: Dict[str, bool] = None,
+                         exact_only: bool = False, date_range: tuple = (None, None)) -> bool:
         """Check if a resource matches all specified criteria."""
         
-        # Text query search
-        if query:
-            if not self._matches_text_query(metadata, query):
-                return False
-        
-        # Tags filter (ALL tags must match)
-        if tags:
-            resource_tags = set(metadata.get("tags", []))
-            if not all(tag in resource_tags for tag in tags):
-                return False
-        
-        # Any tags filter (ANY tag can match)
-        if any_tags:
-            resource_tags = set(metadata.get("tags", []))
-            if not any(tag in resource_tags for tag in any_tags):
+        # Access count filter
+        if min_access_count > 0:
+            access_count = metadata.get("access_count", 0)
+            if access_count < min_access_count:
                 return False
         
         # Category filter
@@ -130,87 +163,129 @@ class SearchService:
             if metadata.get("type") != resource_type:
                 return False
         
-        # Date range filters
-        if created_after:
-            created_at = metadata.get("created_at", "")
-            if created_at and created_at < created_after:
-                return False
-        
-        if created_before:
+        # Date range filters; bounds parsed up front are compared as epoch seconds,
+        # anything unparseable falls back to comparing the ISO strings
+        if created_after or created_before:
             created_at = metadata.get("created_at", "")
-            if created_at and created_at > created_before:
-                return False
+            if created_at:
+                created_at_ts = metadata.get("created_at_ts")
+                after_ts, before_ts = date_range
+                if created_after:
+                    if after_ts is not None and created_at_ts is not None:
+                        if created_at_ts < after_ts:
+                            return False
+                    elif created_at < created_after:
+                        return False
+                if created_before:
+                    if before_ts is not None and created_at_ts is not None:
+                        if created_at_ts > before_ts:
+                            return False
+                    elif created_at > created_before:
+                        return False
         
-        # Access count filter
-        if min_access_count > 0:
-            access_count = metadata.get("access_count", 0)
-            if access_count < min_access_count:
+        # Text query search last; fuzzy matching is by far the most expensive check
+        if query:
+            if not self._matches_text_query(uri, query, word_cache, exact_only):
                 return False
         
         return True
     
-    def _matches_text_query(self, metadata: Dict[str, Any], query: str) -> bool:
-        """Check if resource matches text query using fuzzy search."""
+    def _parse_date_bound(self, value: Optional[str]) -> Optional[float]:
+        """Parse an ISO date/datetime filter bound to epoch seconds, or None."""
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            return None
+    
+    def _matches_text_query(self, uri: str, query: str, word_cache: Dict[str, bool] = None,
+                            exact_only: bool = False) -> bool:
+        """Check if resource matches text query using fuzzy search, or substring search if exact_only."""
         query_lower = query.lower()
         
-        # Search in name
-        name = metadata.get("name", "").lower()
-        if self._fuzzy_match(name, query_lower):
-            return True
+        # Name, description, tags, SQL query and column names, lowercased at index time
+        text, words = self.resource_manager.search_text(uri)
         
-        # Search in description
-        description = metadata.get("description", "").lower()
-        if self._fuzzy_match(description, query_lower):
+        # Exact match in any field (fields are NUL-separated, so a match can't span two)
+        if query_lower in text:
             return True
+        if exact_only:
+            return False
+        
+        return self._fuzzy_word_match(words, query_lower, word_cache)
+    
+    def _fuzzy_word_match(self, text_words, query: str, word_cache: Dict[str, bool] = None,
+                          threshold: float = 0.6) -> bool:
+        """Match query words against a set of text words by containment or similarity.
         
-        # Search in tags
-        tags = [tag.lower() for tag in metadata.get("tags", [])]
-        for tag in tags:
-            if self._fuzzy_match(tag, query_lower):
+        word_cache holds each text word's verdict for the current query, so words
+        shared by many resources are only scored once per search.
+        """
+        query_words = [word for word in query.split() if len(word) >= 3]  # Skip very short words
+        if not query_words:
+            return False
+        if word_cache is None:
+            word_cache = {}
+        
+        # Check if any word in text contains a query word (or vice versa)
+        unscored = []
+        for text_word in text_words:
+            matched = word_cache.get(text_word)
+            if matched is None:
+                if any(query_word in text_word or text_word in query_word for query_word in query_words):
+                    word_cache[text_word] = True
+                    return True
+                unscored.append(text_word)
+            elif matched:
                 return True
         
-        # Search in SQL query (for table resources)
-        type_metadata = metadata.get("metadata", {})
-        sql_query = type_metadata.get("sql_query", "").lower()
-        if self._fuzzy_match(sql_query, query_lower):
-            return True
+        if not unscored:
+            return False
         
-        # Search in column names (for table resources)
-        columns = [col.lower() for col in type_metadata.get("columns", [])]
-        for column in columns:
-            if self._fuzzy_match(column, query_lower):
+        # Fuzzy similarity check. Verdicts are remembered per query word across
+        # searches, so refining "sales" to "sales region" only scores the new word
+        similarity_verdicts = [self._similarity_verdicts(query_word, threshold) for query_word in query_words]
+        matcher = None
+        for text_word in unscored:
+            matched = False
+            for query_word, verdicts in zip(query_words, similarity_verdicts):
+                similar = verdicts.get(text_word)
+                if similar is None:
+                    # The matcher caches its analysis of the text word, and the cheap
+                    # upper bounds rule out most pairs before the full ratio()
+                    if matcher is None:
+                        matcher = SequenceMatcher(None)
+                    matcher.set_seq2(text_word)
+                    matcher.set_seq1(query_word)
+                    similar = (matcher.real_quick_ratio() >= threshold and matcher.quick_ratio() >= threshold
+                               and matcher.ratio() >= threshold)
+                    verdicts[text_word] = similar
+                if similar:
+                    matched = True
+                    break
+            word_cache[text_word] = matched
+            if matched:
                 return True
         
         return False
     
-    def _fuzzy_match(self, text: str, query: str, threshold: float = 0.6) -> bool:
-        """Perform fuzzy string matching."""
-        # Exact match
-        if query in text:
-            return True
+    def _similarity_verdicts(self, query_word: str, threshold: float) -> Dict[str, bool]:
+        """Remembered similarity verdicts of text words against one query word."""
+        key = (query_word, threshold)
+        verdicts = self._similarity_cache.get(key)
+        if verdicts is not None:
+            self._similarity_cache.move_to_end(key)
+            return verdicts
         
-        # Word-based matching
-        query_words = query.split()
-        text_words = text.split()
-        
-        for query_word in query_words:
-            if len(query_word) < 3:  # Skip very short words
-                continue
-            
-            # Check if any word in text contains the query word
-            for text_word in text_words:
-                if query_word in text_word or text_word in query_word:
-                    return True
-                
-                # Fuzzy similarity check
-                similarity = SequenceMatcher(None, query_word, text_word).ratio()
-                if similarity >= threshold:
-                    return True
-        
-        return False
+        verdicts = self._similarity_cache[key] = {}
+        while len(self._similarity_cache) > _SIMILARITY_CACHE_SIZE:
+            self._similarity_cache.popitem(last=False)
+        return verdicts
     
-    def _sort_results(self, resources: List[Dict[str, Any]], sort_by: str, sort_order: str) -> List[Dict[str, Any]]:
-        """Sort results by specified field and order."""
+    def _sort_results(self, resources: List[Dict[str, Any]], sort_by: str, sort_order: str,
+                      limit: int = 0) -> List[Dict[str, Any]]:
+        """Sort results by specified field and order, keeping at least the top `limit`."""
         reverse = sort_order.lower() == "desc"
         
         def get_sort_key(item):
@@ -228,6 +303,11 @@ class SearchService:
             else:
                 return metadata.get(sort_by, "")
         
+        # A small limit only needs the top entries; nlargest/nsmallest keep sorted()'s tie order
+        if 0 < limit < len(resources) // 4:
+            select = heapq.nlargest if reverse else heapq.nsmallest
+            return select(limit, resources, key=get_sort_key)
+        
         return sorted(resources, key=get_sort_key, reverse=reverse)
     
     def get_popular_resources(self, limit: int = 10) -> List[Dict[str, Any]]:
@@ -241,11 +321,24 @@ class SearchService:
     
     def get_recent_resources(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get recently created resources."""
-        return self.search_resources(
-            sort_by="created_at",
-            sort_order="desc",
-            limit=limit
-        )
+        try:
+            # The manager keeps URIs in creation order, so only `limit` entries are read
+            results = [self._format_result(uri, metadata)
+                       for uri, metadata in self.resource_manager.most_recent(limit)]
+            return {
+                "results": results,
+                "total_count": len(results),
+                "search_criteria": {},
+                "status": "completed"
+            }
+        except Exception as e:
+            return {
+                "results": [],
+                "total_count": 0,
+                "search_criteria": {},
+                "status": "failed",
+                "error": str(e)
+            }
     
     def get_resources_by_category(self, category: str, limit: int = 50) -> List[Dict[str, Any]]:
         """Get resources by category."""
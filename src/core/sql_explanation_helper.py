@@ -3,15 +3,81 @@ SQL Explanation Helper for the MCP server.
 Handles generation of explanations for SQL queries.
 """
 
+import asyncio
+import hashlib
+import json
 import os
+import re
 import openai
+from collections import OrderedDict
+
+# System prompt per target audience; "_default" covers any other audience
+_SYSTEM_PROMPTS = {
+    "business_user": """You are a data analyst explaining SQL queries to business users.
+Explain what the query does in simple, non-technical terms that a business person would understand.
+Focus on the business value and insights the query provides.
+Use clear, concise language and avoid technical jargon.""",
+    "developer": """You are a senior developer explaining SQL queries to other developers.
+Explain the technical aspects of the query, including:
+- What tables and columns are being used
+- How joins and relationships work
+- Performance considerations
+- Potential optimizations
+Use technical but clear language.""",
+    "analyst": """You are a data analyst explaining SQL queries to other analysts.
+Explain the analytical approach and methodology:
+- What data is being analyzed
+- What insights can be derived
+- Statistical or analytical concepts used
+- Potential follow-up analyses
+Use analytical terminology appropriately.""",
+    "_default": """Explain the following SQL query in clear, understandable terms.
+Describe what the query does and what results it will produce."""
+}
+
+# Completion token budget per target audience; other audiences get _DEFAULT_MAX_TOKENS
+_MAX_TOKENS = {
+    "business_user": 200,
+    "developer": 400,
+    "analyst": 400
+}
+_DEFAULT_MAX_TOKENS = 300
+
+# Used by generate_detailed_explanation to get all three audiences from one request
+_MULTI_AUDIENCE_SYSTEM_PROMPT = """You are a data analyst explaining SQL queries to three different audiences.
+Return a JSON object with exactly these string fields:
+- "business_user": what the query does in simple, non-technical terms, focusing on the business value and insights it provides
+- "developer": the technical aspects - tables and columns used, how joins and relationships work, performance considerations and potential optimizations
+- "analyst": the analytical approach - what data is analyzed, what insights can be derived, statistical or analytical concepts used and potential follow-up analyses
+Use clear, concise language suited to each audience."""
+
+# Quoted literals/identifiers, comments, whitespace runs, and everything else
+_SQL_TOKEN_RE = re.compile(r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|--[^\n]*|/\*.*?\*/|\s+|[^'"\s/-]+|.""", re.DOTALL)
+
+def _normalize_sql(sql_query: str) -> str:
+    """Drop comments, collapse whitespace and lowercase a query outside its quoted parts."""
+    parts = []
+    for token in _SQL_TOKEN_RE.findall(sql_query):
+        if token[0] in "'\"":
+            parts.append(token)
+        elif token[0].isspace() or token.startswith(("--", "/*")):
+            if parts and parts[-1] != " ":
+                parts.append(" ")
+        else:
+            parts.append(token.lower())
+    return "".join(parts).strip()
 
 class SQLExplanationHelper:
     """Helper class for generating SQL explanations."""
     
     def __init__(self):
-        self.openai_client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        # Async client so explanation requests don't block the event loop and can run concurrently
+        self.openai_client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
         self.model = os.getenv("OPENAI_MODEL", "gpt-4o")
+        
+        # LRU of generated explanations: (normalized query hash, audience, model) -> explanation
+        self._cache: "OrderedDict[tuple, str]" = OrderedDict()
+        self._cache_size = int(os.getenv("EXPLANATION_CACHE_SIZE", "512"))
     
     async def generate_explanation(self, sql_query: str, target_audience: str = "business_user") -> str:
         """Generate explanation for a SQL query.
@@ -23,46 +89,26 @@ class SQLExplanationHelper:
         Returns:
             str: Human-readable explanation of the SQL query
         """
+        cache_key = self._cache_key(sql_query, target_audience)
+        cached = self._cached_explanation(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            # Customize prompt based on target audience
-            if target_audience == "business_user":
-                system_prompt = """You are a data analyst explaining SQL queries to business users. 
-                Explain what the query does in simple, non-technical terms that a business person would understand.
-                Focus on the business value and insights the query provides.
-                Use clear, concise language and avoid technical jargon."""
-                
-            elif target_audience == "developer":
-                system_prompt = """You are a senior developer explaining SQL queries to other developers.
-                Explain the technical aspects of the query, including:
-                - What tables and columns are being used
-                - How joins and relationships work
-                - Performance considerations
-                - Potential optimizations
-                Use technical but clear language."""
-                
-            elif target_audience == "analyst":
-                system_prompt = """You are a data analyst explaining SQL queries to other analysts.
-                Explain the analytical approach and methodology:
-                - What data is being analyzed
-                - What insights can be derived
-                - Statistical or analytical concepts used
-                - Potential follow-up analyses
-                Use analytical terminology appropriately."""
-                
-            else:
-                system_prompt = """Explain the following SQL query in clear, understandable terms.
-                Describe what the query does and what results it will produce."""
+            system_prompt = _SYSTEM_PROMPTS.get(target_audience, _SYSTEM_PROMPTS["_default"])
             
-            response = self.openai_client.chat.completions.create(
+            response = await self.openai_client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": f"SQL Query: {sql_query}\n\nPlease explain what this query does."}
                 ],
-                temperature=0.3
+                temperature=0.3,
+                max_tokens=_MAX_TOKENS.get(target_audience, _DEFAULT_MAX_TOKENS)
             )
             
             explanation = response.choices[0].message.content.strip()
+            self._cache_explanation(cache_key, explanation)
             return explanation
             
         except Exception as e:
@@ -75,12 +121,19 @@ class SQLExplanationHelper:
             dict: Dictionary containing explanations for different audiences
         """
         try:
-            explanations = {}
-            
-            # Generate explanations for different audiences
-            explanations["business_user"] = await self.generate_explanation(sql_query, "business_user")
-            explanations["developer"] = await self.generate_explanation(sql_query, "developer")
-            explanations["analyst"] = await self.generate_explanation(sql_query, "analyst")
+            # One request covers every audience; fall back to separate concurrent
+            # requests only if the combined reply can't be used
+            audiences = ("business_user", "developer", "analyst")
+            cached = [self._cached_explanation(self._cache_key(sql_query, audience)) for audience in audiences]
+            if all(explanation is not None for explanation in cached):
+                explanations = dict(zip(audiences, cached))
+            else:
+                explanations = await self._generate_combined_explanations(sql_query, audiences)
+            if explanations is None:
+                results = await asyncio.gather(
+                    *(self.generate_explanation(sql_query, audience) for audience in audiences)
+                )
+                explanations = dict(zip(audiences, results))
             
             return {
                 "sql_query": sql_query,
@@ -93,4 +146,58 @@ class SQLExplanationHelper:
                 "sql_query": sql_query,
                 "error": str(e),
                 "status": "failed"
-            } 
\ No newline at end of file
+            }
+    
+    async def _generate_combined_explanations(self, sql_query: str, audiences: tuple) -> dict:
+        """Request explanations for all audiences at once; None if the reply isn't usable JSON."""
+        try:
+            response = await self.openai_client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": _MULTI_AUDIENCE_SYSTEM_PROMPT},
+                    {"role": "user", "content": f"SQL Query: {sql_query}\n\nPlease explain what this query does."}
+                ],
+                temperature=0.3,
+                max_tokens=sum(_MAX_TOKENS.get(audience, _DEFAULT_MAX_TOKENS) for audience in audiences),
+                response_format={"type": "json_object"}
+            )
+        except Exception as e:
+            # Separate requests would fail the same way
+            return {audience: f"Error generating explanation: {str(e)}" for audience in audiences}
+        
+        try:
+            explanations = json.loads(response.choices[0].message.content)
+        except (TypeError, ValueError):
+            return None
+        
+        if not isinstance(explanations, dict):
+            return None
+        if not all(isinstance(explanations.get(audience), str) and explanations[audience].strip() for audience in audiences):
+            return None
+        
+        explanations = {audience: explanations[audience].strip() for audience in audiences}
+        for audience, explanation in explanations.items():
+            self._cache_explanation(self._cache_key(sql_query, audience), explanation)
+        return explanations
+    
+    def _cache_key(self, sql_query: str, target_audience: str) -> tuple:
+        """Cache key for an explanation of a query for one audience.
+        
+        Queries differing only in comments, whitespace or keyword case share a key.
+        """
+        digest = hashlib.blake2b(_normalize_sql(sql_query).encode(), digest_size=16).digest()
+        return (digest, target_audience, self.model)
+    
+    def _cached_explanation(self, key: tuple):
+        """Return a cached explanation, marking it recently used, or None."""
+        explanation = self._cache.get(key)
+        if explanation is not None:
+            self._cache.move_to_end(key)
+        return explanation
+    
+    def _cache_explanation(self, key: tuple, explanation: str):
+        """Store a successful explanation, evicting the least recently used."""
+        self._cache[key] = explanation
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
\ No newline at end of file
@@ -4,90 +4,235 @@ Handles SQL generation, validation, and execution.
 """
 
 import asyncio
-import json
+import hashlib
+import logging
 import os
-from typing import Dict, Any, Optional
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
 import openai
-from sqlalchemy import create_engine, text, inspect
+import orjson
+from sqlalchemy import create_engine, text, inspect, select, literal_column, table
+from sqlalchemy.engine import Engine
 from sqlalchemy.exc import SQLAlchemyError
+import numpy as np
 import pandas as pd
 
+logger = logging.getLogger(__name__)
+
+_VALIDATE_SYSTEM_PROMPT = """Analyze this SQL query for:
+1. Syntax correctness
+2. Potential security issues
+3. Performance considerations
+4. Best practices
+
+Return a JSON response with:
+- valid: boolean
+- issues: array of strings
+- suggestions: array of strings
+- risk_level: "low", "medium", "high"
+"""
+
+def _dumps(obj: Any) -> str:
+    """Serialize a result as indented JSON; values JSON can't represent become str()."""
+    return orjson.dumps(
+        obj, default=str,
+        option=orjson.OPT_INDENT_2 | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    ).decode()
+
+def _render_schema_context(schema_data: Dict[str, Any]) -> str:
+    """Render the schema block of the SQL generation prompt.
+    
+    Tables and relationships are sorted so the same schema always renders to the same text.
+    """
+    # Collect the pieces and join once; += on a growing string copies it for every column
+    parts = [
+        "\n\nDatabase Schema Information:\n",
+        f"Database Type: {schema_data.get('database_type', 'unknown')}\n",
+        "Tables and their columns:\n"
+    ]
+    
+    for table_name, table_info in sorted(schema_data.get('tables', {}).items()):
+        parts.append(f"\nTable: {table_name}\n")
+        parts.extend(
+            f"  - {col['name']}: {col['type']}{' (PRIMARY KEY)' if col.get('primary_key') else ''}\n"
+            for col in table_info.get('columns', [])
+        )
+    
+    # Add relationships
+    relationships = schema_data.get('relationships', [])
+    if relationships:
+        parts.append("\nTable Relationships:\n")
+        parts.extend(
+            f"  - {rel['table']}.{rel['column']} -> {rel['references']}\n"
+            for rel in sorted(relationships, key=lambda rel: (rel['table'], rel['column'], rel['references']))
+        )
+    
+    return "".join(parts)
+
+# Shared engines by connection string, least recently used first; each keeps a pool
+# of DB_POOL_SIZE connections plus up to DB_MAX_OVERFLOW more under load
+_engines: "OrderedDict[str, Engine]" = OrderedDict()
+_MAX_ENGINES = 32
+_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+def _get_engine(connection_string: str) -> Engine:
+    """Shared engine per connection string, so its connection pool is reused across calls."""
+    engine = _engines.get(connection_string)
+    if engine is not None:
+        _engines.move_to_end(connection_string)
+        return engine
+    
+    if connection_string.startswith("sqlite"):
+        # The shared engine may be used from worker threads
+        engine = create_engine(connection_string, connect_args={"check_same_thread": False})
+    else:
+        engine = create_engine(connection_string, pool_pre_ping=True,
+                               pool_size=_POOL_SIZE, max_overflow=_MAX_OVERFLOW)
+    _engines[connection_string] = engine
+    while len(_engines) > _MAX_ENGINES:
+        _, evicted = _engines.popitem(last=False)
+        evicted.dispose()
+    return engine
+
+def dispose_engines():
+    """Close the pooled connections of every shared engine."""
+    while _engines:
+        _, engine = _engines.popitem()
+        engine.dispose()
+
+# Statements validate_sql flags as high risk, matched as whole words in one pass
+_DANGEROUS_SQL_RE = re.compile(r"\b(?:DROP|DELETE|TRUNCATE|ALTER|CREATE|INSERT|UPDATE)\b", re.IGNORECASE)
+
+# Plain SELECTs; execute_sql runs identical ones that overlap only once
+_SHAREABLE_SQL_RE = re.compile(r"\s*SELECT\b", re.IGNORECASE)
+
+# Sample queries discover_schema runs at once; stays within the default engine pool (5 + 10 overflow)
+_SAMPLE_QUERY_CONCURRENCY = 8
+
+# Formatted schema text, as rendered by ResourceManager for schema resources
+_DB_TYPE_RE = re.compile(r"Database Type:(?P<db_type>[^\n]*?)(?=Database Type:|$)", re.MULTILINE)
+_TABLE_HEADING_RE = re.compile(r"^[ \t]*## Table:(?P<table>[^\n]*)$", re.MULTILINE)
+_COLUMNS_BLOCK_RE = re.compile(r"^[ \t]*\*\*Columns:\*\*[ \t]*\n(?P<body>(?:[ \t]*\S[^\n]*(?:\n|$))*)", re.MULTILINE)
+_COLUMN_RE = re.compile(r"^[ \t]*- (?P<name>[^:\n]*):(?P<type>[^:\n]*)", re.MULTILINE)
+_RELATIONSHIP_RE = re.compile(r"^[ \t]*- (?P<left>[^\n]*?\.[^\n]*?)->(?P<right>[^\n]*)$", re.MULTILINE)
+
+# Batch API polling: start at a few seconds, back off to at most five minutes
+_BATCH_POLL_INITIAL_SECONDS = 5
+_BATCH_POLL_MAX_SECONDS = 300
+
 class SQLTools:
     """Core SQL tools for the MCP server."""
     
-    def __init__(self):
-        self.openai_client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(self, resource_manager=None):
+        # Resource store shared with the caller (e.g. the HTTP server's), so every
+        # tool call reads and writes one long-lived manager; created on first use if omitted
+        self.resource_manager = resource_manager
+        
+        # Async client so completions don't block the event loop; it retries
+        # rate-limited and failed requests with backoff on its own, and keeps its
+        # connections alive so back-to-back calls skip the TCP/TLS handshake.
+        # Fail fast on connect instead of waiting out the 10-minute default
+        self.openai_client = openai.AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            timeout=openai.Timeout(float(os.getenv("OPENAI_TIMEOUT", "60")), connect=5.0)
+        )
         self.model = os.getenv("OPENAI_MODEL", "gpt-4o")
+        
+        # LRU of assembled system prompts: (db_type, schema_uri) -> (checked at, schema version,
+        # prompt). Reusing the exact same text also keeps the provider's prompt prefix cache warm.
+        # Within the recheck window a prompt is served without touching the resource store;
+        # after it, the stored schema's version decides whether the prompt is still current
+        self._prompt_cache: "OrderedDict[tuple, Tuple[float, tuple, str]]" = OrderedDict()
+        self._prompt_cache_size = int(os.getenv("SQL_PROMPT_CACHE_SIZE", "32"))
+        self._prompt_recheck_seconds = float(os.getenv("SQL_PROMPT_RECHECK_SECONDS", "60"))
+        
+        # LRU of generated SQL: (prompt digest, query digest) -> (stored at, sql)
+        self._sql_cache: "OrderedDict[tuple, Tuple[float, str]]" = OrderedDict()
+        self._sql_cache_size = int(os.getenv("SQL_CACHE_SIZE", "256"))
+        self._sql_cache_ttl = float(os.getenv("SQL_CACHE_TTL", "3600"))
+        
+        # Paraphrase reuse: prompt digest -> [(unit query embedding, cache key)]. Off unless
+        # a cosine similarity threshold is configured, since near-identical wording can
+        # still ask for different SQL ("top 5" vs "top 10")
+        threshold = os.getenv("SQL_SEMANTIC_CACHE_THRESHOLD")
+        self._semantic_threshold = float(threshold) if threshold else None
+        self._embedding_model = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+        self._sql_embeddings: Dict[bytes, List[Tuple[np.ndarray, tuple]]] = {}
+        
+        # LRU of the model's validation replies: (query digest, model) -> analysis text
+        self._validation_cache: "OrderedDict[tuple, str]" = OrderedDict()
+        self._validation_cache_size = int(os.getenv("VALIDATION_CACHE_SIZE", "1024"))
+        
+        # (connection string, query, max_rows) -> task of the execution in progress
+        self._inflight_queries: Dict[tuple, asyncio.Task] = {}
+    
+    def _resource_manager(self):
+        """The resource store, created once on first use unless one was passed in."""
+        if self.resource_manager is None:
+            from core.resource_manager import ResourceManager
+            self.resource_manager = ResourceManager()
+        return self.resource_manager
     
     async def generate_sql(self, nl_query: str, db_type: str = "postgresql", schema_uri: str = None) -> str:
+        """Generate SQL query from natural language description, as a JSON string."""
+        return _dumps(await self.generate_sql_raw(
+            nl_query, db_type, schema_uri
+        ))
+    
+    async def generate_sql_raw(self, nl_query: str, db_type: str = "postgresql", schema_uri: str = None) -> Dict[str, Any]:
         """Generate SQL query from natural language description, and provide an explanation."""
         try:
-            # Build system prompt with schema context if available
-            system_prompt = f"""You are a SQL expert. Generate a valid {db_type} SQL query based on the natural language description.
-
-Key guidelines:
-- Use proper {db_type} syntax
-- Include appropriate JOINs when needed
-- Use meaningful table and column aliases
-- Add comments explaining complex logic
-- Ensure the query is safe and follows best practices
-- Use the exact table and column names from the database schema
-
-Return only the SQL query, no explanations."""
-
-            # Add schema context if available
-            if schema_uri:
-                # Fetch schema data from resource manager
-                from core.resource_manager import ResourceManager
-                resource_manager = ResourceManager()
-                
-                try:
-                    print(f"🔍 Attempting to load schema from: {schema_uri}")
-                    # Read the schema resource
-                    schema_content = await resource_manager.read_resource(schema_uri, raw=True)
-                    print(f"📄 Schema content length: {len(schema_content) if schema_content else 0}")
-                    
-                    if schema_content and len(schema_content) > 0:
-                        schema_text = schema_content[0].text
-                        print(f"📝 Schema text preview: {schema_text[:200]}...")
-                        
-                        # Parse as JSON (should work now since we're getting raw data)
-                        try:
-                            schema_data = json.loads(schema_text)
-                            print(f"✅ Schema parsed successfully with {len(schema_data.get('tables', {}))} tables")
-                        except json.JSONDecodeError:
-                            # Fallback to text parsing if needed
-                            print(f"📋 Parsing formatted schema text...")
-                            schema_data = self._extract_schema_from_text(schema_text)
-                            print(f"📋 Extracted schema info: {len(schema_data.get('tables', {}))} tables")
-                        
-                        # Build schema context for the prompt
-                        schema_context = f"\n\nDatabase Schema Information:\n"
-                        schema_context += f"Database Type: {schema_data.get('database_type', 'unknown')}\n"
-                        schema_context += f"Tables and their columns:\n"
-                        
-                        for table_name, table_info in schema_data.get('tables', {}).items():
-                            schema_context += f"\nTable: {table_name}\n"
-                            for col in table_info.get('columns', []):
-                                pk_marker = " (PRIMARY KEY)" if col.get('primary_key') else ""
-                                schema_context += f"  - {col['name']}: {col['type']}{pk_marker}\n"
-                        
-                        # Add relationships
-                        relationships = schema_data.get('relationships', [])
-                        if relationships:
-                            schema_context += f"\nTable Relationships:\n"
-                            for rel in relationships:
-                                schema_context += f"  - {rel['table']}.{rel['column']} -> {rel['references']}\n"
-                        
-                        system_prompt += schema_context
-                        system_prompt += f"\n\nIMPORTANT: Use ONLY the exact table and column names listed above. Do not use generic names like 'user_id', 'username', 'total_amount'."
-                        print(f"📋 Schema context added to prompt")
-                        
-                except Exception as e:
-                    print(f"❌ Warning: Could not load schema from {schema_uri}: {e}")
-                    system_prompt += f"\n\nSchema reference: {schema_uri} (could not load)"
-
-            response = self.openai_client.chat.completions.create(
+            system_prompt = await self._build_system_prompt(db_type, schema_uri)
+            return await self._generate_sql_result(nl_query, db_type, schema_uri, system_prompt)
+        except Exception as e:
+            return {
+                "error": str(e),
+                "status": "failed"
+            }
+    
+    async def generate_sql_many(self, nl_queries: List[str], db_type: str = "postgresql",
+                                schema_uri: str = None, max_concurrency: int = 4) -> str:
+        """Generate SQL for several natural language queries concurrently.
+        
+        At most max_concurrency completions are in flight at once, to stay within rate limits.
+        """
+        try:
+            # Every query shares the same schema-bearing system prompt
+            system_prompt = await self._build_system_prompt(db_type, schema_uri)
+            semaphore = asyncio.Semaphore(max_concurrency)
+            
+            async def generate(nl_query: str) -> Dict[str, Any]:
+                async with semaphore:
+                    try:
+                        return await self._generate_sql_result(nl_query, db_type, schema_uri, system_prompt)
+                    except Exception as e:
+                        return {"nl_query": nl_query, "error": str(e), "status": "failed"}
+            
+            results = await asyncio.gather(*(generate(nl_query) for nl_query in nl_queries))
+            return _dumps({"results": results, "status": "completed"})
+        except Exception as e:
+            return _dumps({
+                "error": str(e),
+                "status": "failed"
+            })
+    
+    async def _generate_sql_result(self, nl_query: str, db_type: str, schema_uri: str,
+                                   system_prompt: str) -> Dict[str, Any]:
+        """Ask the model for the SQL answering one natural language query, reusing cached answers."""
+        cache_key = self._sql_cache_key(system_prompt, nl_query)
+        sql_query = self._cached_sql(cache_key)
+        
+        embedding = None
+        if sql_query is None and self._semantic_threshold is not None:
+            embedding = await self._embed(nl_query)
+            if embedding is not None:
+                sql_query = self._similar_sql(cache_key[0], embedding)
+        
+        if sql_query is None:
+            response = await self.openai_client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -96,200 +241,500 @@ Return only the SQL query, no explanations."""
                 temperature=0.3
             )
             sql_query = response.choices[0].message.content.strip()
-
-            # Return structured result (SQL only, no explanation)
-            result = {
-                "sql_query": sql_query,
-                "db_type": db_type,
-                "nl_query": nl_query,
-                "schema_uri": schema_uri,
-                "status": "generated"
-            }
-            return json.dumps(result, indent=2)
+            self._cache_sql(cache_key, sql_query, embedding)
+        
+        # Return structured result (SQL only, no explanation)
+        return {
+            "sql_query": sql_query,
+            "db_type": db_type,
+            "nl_query": nl_query,
+            "schema_uri": schema_uri,
+            "status": "generated"
+        }
+    
+    def _sql_cache_key(self, system_prompt: str, nl_query: str) -> tuple:
+        """Cache key for generated SQL: the exact prompt and model, and the query up to case and spacing."""
+        prompt_digest = hashlib.blake2b(f"{self.model}\0{system_prompt}".encode(), digest_size=16).digest()
+        query_digest = hashlib.blake2b(" ".join(nl_query.lower().split()).encode(), digest_size=16).digest()
+        return (prompt_digest, query_digest)
+    
+    def _cached_sql(self, key: tuple) -> Optional[str]:
+        """Return unexpired cached SQL, marking it recently used, or None."""
+        entry = self._sql_cache.get(key)
+        if entry is None:
+            return None
+        stored_at, sql_query = entry
+        if time.monotonic() - stored_at > self._sql_cache_ttl:
+            del self._sql_cache[key]
+            return None
+        self._sql_cache.move_to_end(key)
+        return sql_query
+    
+    def _cache_sql(self, key: tuple, sql_query: str, embedding: Optional[np.ndarray] = None):
+        """Store generated SQL, evicting the least recently used."""
+        self._sql_cache[key] = (time.monotonic(), sql_query)
+        self._sql_cache.move_to_end(key)
+        while len(self._sql_cache) > self._sql_cache_size:
+            self._sql_cache.popitem(last=False)
+        if embedding is not None:
+            self._sql_embeddings.setdefault(key[0], []).append((embedding, key))
+    
+    async def _embed(self, text: str) -> Optional[np.ndarray]:
+        """Unit-length embedding of a text, or None if the embeddings call fails."""
+        try:
+            response = await self.openai_client.embeddings.create(model=self._embedding_model, input=text)
         except Exception as e:
-            return json.dumps({
-                "error": str(e),
-                "status": "failed"
-            }, indent=2)
+            print(f"⚠️  Could not embed query for the SQL cache: {e}")
+            return None
+        vector = np.asarray(response.data[0].embedding, dtype=np.float32)
+        return vector / np.linalg.norm(vector)
     
-    async def validate_sql(self, sql_query: str) -> str:
-        """Validate SQL query for syntax and safety."""
+    def _similar_sql(self, prompt_digest: bytes, embedding: np.ndarray) -> Optional[str]:
+        """Cached SQL of the most similar earlier query under the same prompt, if similar enough."""
+        # Drop entries whose SQL has been evicted
+        entries = [entry for entry in self._sql_embeddings.get(prompt_digest, []) if entry[1] in self._sql_cache]
+        self._sql_embeddings[prompt_digest] = entries
+        if not entries:
+            return None
+        
+        similarities = np.stack([vector for vector, _ in entries]) @ embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] < self._semantic_threshold:
+            return None
+        return self._cached_sql(entries[best][1])
+    
+    async def generate_sql_batch(self, nl_queries: List[str], db_type: str = "postgresql",
+                                 schema_uri: str = None) -> str:
+        """Generate SQL for many natural language queries through the OpenAI Batch API.
+        
+        Batches cost half as much as direct calls but may take up to 24 hours, so this
+        is meant for offline workloads; use generate_sql when latency matters.
+        """
         try:
-            # Basic SQL injection check
-            dangerous_keywords = [
-                "DROP", "DELETE", "TRUNCATE", "ALTER", "CREATE", "INSERT", "UPDATE"
-            ]
+            # Every query shares the same schema-bearing system prompt
+            system_prompt = await self._build_system_prompt(db_type, schema_uri)
+            outputs = await self._run_batch([
+                self._batch_request(i, system_prompt, nl_query, 0.3)
+                for i, nl_query in enumerate(nl_queries)
+            ])
             
-            sql_upper = sql_query.upper()
-            has_dangerous_operations = any(keyword in sql_upper for keyword in dangerous_keywords)
+            results = []
+            for i, nl_query in enumerate(nl_queries):
+                content, error = outputs.get(str(i), (None, "No result returned by the batch"))
+                if error:
+                    results.append({"nl_query": nl_query, "error": error, "status": "failed"})
+                else:
+                    results.append({
+                        "sql_query": content.strip(),
+                        "db_type": db_type,
+                        "nl_query": nl_query,
+                        "schema_uri": schema_uri,
+                        "status": "generated"
+                    })
             
-            # Use OpenAI to analyze the query
-            system_prompt = """Analyze this SQL query for:
-1. Syntax correctness
-2. Potential security issues
-3. Performance considerations
-4. Best practices
+            return _dumps({"results": results, "status": "completed"})
+        except Exception as e:
+            return _dumps({
+                "error": str(e),
+                "status": "failed"
+            })
+    
+    async def _build_system_prompt(self, db_type: str, schema_uri: str = None) -> str:
+        """Build the SQL generation system prompt, with schema context if available."""
+        system_prompt = f"""You are a SQL expert. Generate a valid {db_type} SQL query based on the natural language description.
 
-Return a JSON response with:
-- valid: boolean
-- issues: array of strings
-- suggestions: array of strings
-- risk_level: "low", "medium", "high"
-"""
+Key guidelines:
+- Use proper {db_type} syntax
+- Include appropriate JOINs when needed
+- Use meaningful table and column aliases
+- Add comments explaining complex logic
+- Ensure the query is safe and follows best practices
+- Use the exact table and column names from the database schema
 
-            response = self.openai_client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": sql_query}
-                ],
-                temperature=0.1
-            )
+Return only the SQL query, no explanations."""
+
+        # Add schema context if available
+        if schema_uri:
+            cache_key = (db_type, schema_uri)
+            cached = self._prompt_cache.get(cache_key)
+            if cached is not None and time.monotonic() - cached[0] < self._prompt_recheck_seconds:
+                self._prompt_cache.move_to_end(cache_key)
+                return cached[2]
+            
+            # Fetch schema data from resource manager
+            resource_manager = self._resource_manager()
             
-            analysis = response.choices[0].message.content.strip()
+            # A re-discovered schema is stored again with a new created_at
+            schema_meta = resource_manager.resources.get(schema_uri)
+            version = None
+            if schema_meta is not None:
+                version = (schema_meta.get("created_at"), schema_meta.get("byte_size"))
+                if cached is not None and cached[1] == version:
+                    self._prompt_cache[cache_key] = (time.monotonic(), version, cached[2])
+                    self._prompt_cache.move_to_end(cache_key)
+                    return cached[2]
             
-            # Try to parse as JSON, fallback to text if needed
             try:
-                analysis_dict = json.loads(analysis)
-            except:
-                analysis_dict = {
-                    "valid": True,
-                    "issues": [],
-                    "suggestions": [],
-                    "risk_level": "low",
-                    "raw_analysis": analysis
-                }
+                logger.debug("🔍 Attempting to load schema from: %s", schema_uri)
+                # Read the schema resource
+                schema_content = await resource_manager.read_resource(schema_uri, raw=True)
+                logger.debug("📄 Schema content length: %d", len(schema_content) if schema_content else 0)
+                
+                if schema_content and len(schema_content) > 0:
+                    schema_text = schema_content[0].text
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("📝 Schema text preview: %s...", schema_text[:200])
+                    
+                    # Parse as JSON (should work now since we're getting raw data)
+                    try:
+                        schema_data = orjson.loads(schema_text)
+                        logger.debug("✅ Schema parsed successfully with %d tables", len(schema_data.get('tables', {})))
+                    except orjson.JSONDecodeError:
+                        # Fallback to text parsing if needed
+                        logger.debug("📋 Parsing formatted schema text...")
+                        schema_data = self._extract_schema_from_text(schema_text)
+                        logger.debug("📋 Extracted schema info: %d tables", len(schema_data.get('tables', {})))
+                    
+                    # Schemas from discover_schema carry their prompt block pre-rendered
+                    schema_pack = schema_data.get('schema_pack')
+                    if schema_pack:
+                        schema_context = schema_pack['text'] + f"Schema version: {schema_pack['version']}\n"
+                    else:
+                        schema_context = _render_schema_context(schema_data)
+                    
+                    system_prompt += schema_context
+                    system_prompt += f"\n\nIMPORTANT: Use ONLY the exact table and column names listed above. Do not use generic names like 'user_id', 'username', 'total_amount'."
+                    logger.debug("📋 Schema context added to prompt")
+                    
+                    if version is not None:
+                        self._prompt_cache[cache_key] = (time.monotonic(), version, system_prompt)
+                        self._prompt_cache.move_to_end(cache_key)
+                        while len(self._prompt_cache) > self._prompt_cache_size:
+                            self._prompt_cache.popitem(last=False)
+                    
+            except Exception as e:
+                print(f"❌ Warning: Could not load schema from {schema_uri}: {e}")
+                system_prompt += f"\n\nSchema reference: {schema_uri} (could not load)"
+        
+        return system_prompt
+    
+    async def validate_sql(self, sql_query: str) -> str:
+        """Validate SQL query for syntax and safety, as a JSON string."""
+        return _dumps(await self.validate_sql_raw(
+            sql_query
+        ))
+    
+    async def validate_sql_raw(self, sql_query: str) -> Dict[str, Any]:
+        """Validate SQL query for syntax and safety."""
+        try:
+            # A query validated before reuses the model's earlier analysis
+            cache_key = (hashlib.blake2b(sql_query.encode(), digest_size=16).digest(), self.model)
+            analysis = self._validation_cache.get(cache_key)
+            if analysis is not None:
+                self._validation_cache.move_to_end(cache_key)
+            else:
+                # Use OpenAI to analyze the query
+                response = await self.openai_client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": _VALIDATE_SYSTEM_PROMPT},
+                        {"role": "user", "content": sql_query}
+                    ],
+                    temperature=0.1
+                )
+                
+                analysis = response.choices[0].message.content.strip()
+                self._validation_cache[cache_key] = analysis
+                while len(self._validation_cache) > self._validation_cache_size:
+                    self._validation_cache.popitem(last=False)
             
-            # Add our own checks
-            if has_dangerous_operations:
-                analysis_dict["risk_level"] = "high"
-                analysis_dict["issues"].append("Contains potentially dangerous operations")
+            return self._validation_result(sql_query, analysis)
             
-            result = {
-                "sql_query": sql_query,
-                "validation": analysis_dict,
-                "status": "validated"
+        except Exception as e:
+            return {
+                "error": str(e),
+                "status": "failed"
             }
+    
+    async def validate_sql_batch(self, sql_queries: List[str]) -> str:
+        """Validate many SQL queries through the OpenAI Batch API (see generate_sql_batch)."""
+        try:
+            outputs = await self._run_batch([
+                self._batch_request(i, _VALIDATE_SYSTEM_PROMPT, sql_query, 0.1)
+                for i, sql_query in enumerate(sql_queries)
+            ])
             
-            return json.dumps(result, indent=2)
+            results = []
+            for i, sql_query in enumerate(sql_queries):
+                content, error = outputs.get(str(i), (None, "No result returned by the batch"))
+                if error:
+                    results.append({"sql_query": sql_query, "error": error, "status": "failed"})
+                else:
+                    results.append(self._validation_result(sql_query, content.strip()))
             
+            return _dumps({"results": results, "status": "completed"})
         except Exception as e:
-            return json.dumps({
+            return _dumps({
                 "error": str(e),
                 "status": "failed"
-            }, indent=2)
+            })
+    
+    def _validation_result(self, sql_query: str, analysis: str) -> Dict[str, Any]:
+        """Combine the model's analysis of a query with our own safety checks."""
+        # Basic SQL injection check
+        has_dangerous_operations = _DANGEROUS_SQL_RE.search(sql_query) is not None
+        
+        # Try to parse as JSON, fallback to text if needed
+        try:
+            analysis_dict = orjson.loads(analysis)
+        except:
+            analysis_dict = {
+                "valid": True,
+                "issues": [],
+                "suggestions": [],
+                "risk_level": "low",
+                "raw_analysis": analysis
+            }
+        
+        # Add our own checks
+        if has_dangerous_operations:
+            analysis_dict["risk_level"] = "high"
+            analysis_dict["issues"].append("Contains potentially dangerous operations")
+        
+        return {
+            "sql_query": sql_query,
+            "validation": analysis_dict,
+            "status": "validated"
+        }
+    
+    def _batch_request(self, index: int, system_prompt: str, user_content: str, temperature: float) -> Dict[str, Any]:
+        """One chat completion request line for a Batch API input file."""
+        return {
+            "custom_id": str(index),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": self.model,
+                "messages": [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_content}
+                ],
+                "temperature": temperature
+            }
+        }
+    
+    async def _run_batch(self, requests: List[Dict[str, Any]]) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+        """Submit requests as one OpenAI batch and wait for it to finish.
+        
+        Returns:
+            Dict mapping each custom_id to (message content, error message)
+        """
+        if not requests:
+            return {}
+        
+        payload = b"\n".join(orjson.dumps(request) for request in requests)
+        input_file = await self.openai_client.files.create(file=("batch.jsonl", payload), purpose="batch")
+        batch = await self.openai_client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        print(f"📦 Submitted batch {batch.id} with {len(requests)} requests")
+        
+        # Poll with exponential backoff until the batch reaches a final state
+        delay = _BATCH_POLL_INITIAL_SECONDS
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _BATCH_POLL_MAX_SECONDS)
+            batch = await self.openai_client.batches.retrieve(batch.id)
+        
+        if batch.status != "completed":
+            raise RuntimeError(f"Batch {batch.id} {batch.status}")
+        
+        outputs = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = await self.openai_client.files.content(file_id)
+            for line in content.text.splitlines():
+                if not line.strip():
+                    continue
+                entry = orjson.loads(line)
+                response = entry.get("response") or {}
+                body = response.get("body") or {}
+                if entry.get("error"):
+                    outputs[entry["custom_id"]] = (None, entry["error"].get("message", str(entry["error"])))
+                elif response.get("status_code") != 200:
+                    error = body.get("error") or {}
+                    outputs[entry["custom_id"]] = (None, error.get("message", f"HTTP {response.get('status_code')}"))
+                else:
+                    outputs[entry["custom_id"]] = (body["choices"][0]["message"]["content"], None)
+        
+        return outputs
     
     async def execute_sql(self, sql_query: str, db_connection: str = "sqlite:///./data/analytics.db",
                          store_as_resource: bool = True, resource_name: str = None,
                          resource_description: str = None, resource_tags: list = None,
                          resource_category: str = None, max_rows: int = 1000) -> str:
+        """Execute SQL query, as a JSON string."""
+        return _dumps(await self.execute_sql_raw(
+            sql_query, db_connection, store_as_resource, resource_name,
+            resource_description, resource_tags, resource_category, max_rows
+        ))
+    
+    async def execute_sql_raw(self, sql_query: str, db_connection: str = "sqlite:///./data/analytics.db",
+                             store_as_resource: bool = True, resource_name: str = None,
+                             resource_description: str = None, resource_tags: list = None,
+                             resource_category: str = None, max_rows: int = 1000) -> Dict[str, Any]:
         """Execute SQL query and return results as a table resource."""
         try:
             import time
             start_time = time.time()
             
-            # Create engine
-            engine = create_engine(db_connection)
-            
-            # Execute query
-            with engine.connect() as conn:
-                result = conn.execute(text(sql_query))
+            # Execute query and fetch results
+            query_result = await self._query_rows(db_connection, sql_query, max_rows)
+            if query_result is not None:
+                columns, rows = query_result
+                data = [dict(zip(columns, row)) for row in rows]
                 
-                # Fetch results
-                if result.returns_rows:
-                    rows = result.fetchall()
-                    columns = result.keys()
-                    
-                    # Apply max_rows limit
-                    if len(rows) > max_rows:
-                        rows = rows[:max_rows]
-                    
-                    # Convert to pandas DataFrame for easier handling
-                    df = pd.DataFrame(rows, columns=columns)
-                    
-                    # Create table resource data
-                    table_data = {
-                        "sql_query": sql_query,
-                        "columns": list(columns),
-                        "row_count": len(rows),
-                        "data": df.to_dict('records'),
-                        "status": "executed"
-                    }
-                    
-                    # Store as resource if requested
-                    resource_uri = None
-                    if store_as_resource:
-                        from core.resource_manager import ResourceManager
-                        resource_manager = ResourceManager()
-                        
-                        # Determine source schema if possible
-                        source_schema = None
-                        if "FROM" in sql_query.upper():
-                            # Try to extract table name to find related schema
-                            import re
-                            match = re.search(r'FROM\s+(\w+)', sql_query, re.IGNORECASE)
-                            if match:
-                                table_name = match.group(1)
-                                # Look for schema resources that contain this table
-                                for uri, meta in resource_manager.resources.items():
-                                    if meta.get("type") == "schema":
-                                        schema_meta = meta.get("metadata", {})
-                                        tables = schema_meta.get("tables", {})
-                                        if table_name in tables:
-                                            source_schema = uri
-                                            break
-                        
-                        resource_uri = await resource_manager.store_table_resource(
-                            table_data=table_data,
-                            sql_query=sql_query,
-                            name=resource_name,
-                            description=resource_description,
-                            tags=resource_tags,
-                            category=resource_category,
-                            source_schema=source_schema
-                        )
-                    
-                    execution_time = time.time() - start_time
-                    
-                    result = {
-                        "sql_query": sql_query,
-                        "columns": list(columns),
-                        "row_count": len(rows),
-                        "data": df.to_dict('records'),
-                        "resource_uri": resource_uri,
-                        "execution_time": round(execution_time, 3),
-                        "status": "executed"
-                    }
-                    
-                    return json.dumps(result, indent=2, default=str)
-                else:
-                    # For non-SELECT queries
-                    execution_time = time.time() - start_time
+                # Create table resource data
+                table_data = {
+                    "sql_query": sql_query,
+                    "columns": list(columns),
+                    "row_count": len(rows),
+                    "data": data,
+                    "status": "executed"
+                }
+                
+                # Store as resource if requested
+                resource_uri = None
+                if store_as_resource:
+                    resource_manager = self._resource_manager()
                     
-                    return json.dumps({
-                        "sql_query": sql_query,
-                        "message": "Query executed successfully (no results returned)",
-                        "execution_time": round(execution_time, 3),
-                        "status": "executed"
-                    }, indent=2)
+                    # Determine source schema if possible
+                    source_schema = None
+                    if "FROM" in sql_query.upper():
+                        # Try to extract table name to find related schema
+                        import re
+                        match = re.search(r'FROM\s+(\w+)', sql_query, re.IGNORECASE)
+                        if match:
+                            table_name = match.group(1)
+                            # Look for schema resources that contain this table
+                            for uri, meta in resource_manager.resources.items():
+                                if meta.get("type") == "schema":
+                                    schema_meta = meta.get("metadata", {})
+                                    tables = schema_meta.get("tables", {})
+                                    if table_name in tables:
+                                        source_schema = uri
+                                        break
                     
+                    resource_uri = await resource_manager.store_table_resource(
+                        table_data=table_data,
+                        sql_query=sql_query,
+                        name=resource_name,
+                        description=resource_description,
+                        tags=resource_tags,
+                        category=resource_category,
+                        source_schema=source_schema
+                    )
+                    # Other processes (e.g. cleanup_resources.py) read the journal from disk
+                    await resource_manager.flush()
+                
+                execution_time = time.time() - start_time
+                
+                result = {
+                    "sql_query": sql_query,
+                    "columns": list(columns),
+                    "row_count": len(rows),
+                    "data": data,
+                    "resource_uri": resource_uri,
+                    "execution_time": round(execution_time, 3),
+                    "status": "executed"
+                }
+                
+                return result
+            else:
+                # For non-SELECT queries
+                execution_time = time.time() - start_time
+                
+                return {
+                    "sql_query": sql_query,
+                    "message": "Query executed successfully (no results returned)",
+                    "execution_time": round(execution_time, 3),
+                    "status": "executed"
+                }
+                
         except SQLAlchemyError as e:
-            return json.dumps({
+            return {
                 "error": f"Database error: {str(e)}",
                 "sql_query": sql_query,
                 "status": "failed"
-            }, indent=2)
+            }
         except Exception as e:
-            return json.dumps({
+            return {
                 "error": str(e),
                 "sql_query": sql_query,
                 "status": "failed"
-            }, indent=2)
+            }
+    
+    async def _query_rows(self, db_connection: str, sql_query: str,
+                          max_rows: int) -> Optional[Tuple[List[str], list]]:
+        """Run a query off the event loop; identical read-only queries in flight share one run."""
+        engine = _get_engine(db_connection)
+        if not _SHAREABLE_SQL_RE.match(sql_query) or _DANGEROUS_SQL_RE.search(sql_query):
+            return await asyncio.to_thread(self._fetch_rows, engine, sql_query, max_rows)
+        
+        key = (db_connection, sql_query, max_rows)
+        task = self._inflight_queries.get(key)
+        if task is None:
+            task = asyncio.ensure_future(asyncio.to_thread(self._fetch_rows, engine, sql_query, max_rows))
+            self._inflight_queries[key] = task
+            task.add_done_callback(lambda _: self._inflight_queries.pop(key, None))
+        # A cancelled caller stops waiting without cancelling the run the others share
+        return await asyncio.shield(task)
+    
+    def _fetch_rows(self, engine: Engine, sql_query: str, max_rows: int) -> Optional[Tuple[List[str], list]]:
+        """Column names and up to max_rows rows of a query, or None if it returns no rows."""
+        # A server-side cursor where supported, so rows beyond max_rows are never transferred
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True).execute(text(sql_query))
+            if not result.returns_rows:
+                return None
+            rows = result.fetchmany(max_rows) if max_rows > 0 else []
+            columns = list(result.keys())
+            result.close()
+            return columns, rows
+    
+    async def iter_rows(self, sql_query: str, db_connection: str = "sqlite:///./data/analytics.db",
+                        max_rows: int = 0, chunk_size: int = 1000):
+        """Yield a query's rows as (columns, rows) chunks, fetched as they're consumed; max_rows 0 means all."""
+        engine = _get_engine(db_connection)
+        conn = await asyncio.to_thread(engine.connect)
+        try:
+            result = await asyncio.to_thread(
+                lambda: conn.execution_options(stream_results=True).execute(text(sql_query))
+            )
+            if not result.returns_rows:
+                raise ValueError("Query returns no rows to stream")
+            columns = list(result.keys())
+            
+            # Always yields at least once, so an empty result still reports its columns
+            remaining = max_rows if max_rows > 0 else None
+            while True:
+                size = chunk_size if remaining is None else min(chunk_size, remaining)
+                rows = await asyncio.to_thread(result.fetchmany, size)
+                yield columns, rows
+                if remaining is not None:
+                    remaining -= len(rows)
+                if len(rows) < size or remaining == 0:
+                    break
+        finally:
+            await asyncio.to_thread(conn.close)
     
     async def get_table_schema(self, table_name: str, db_connection: str = "sqlite:///./data/analytics.db") -> str:
         """Get schema information for a specific table."""
         try:
-            engine = create_engine(db_connection)
+            engine = _get_engine(db_connection)
             inspector = inspect(engine)
             
             # Get column information
@@ -309,22 +754,31 @@ Return a JSON response with:
                 "status": "retrieved"
             }
             
-            return json.dumps(schema_info, indent=2, default=str)
+            return _dumps(schema_info)
             
         except Exception as e:
-            return json.dumps({
+            return _dumps({
                 "error": str(e),
                 "table_name": table_name,
                 "status": "failed"
-            }, indent=2)
+            })
     
     async def discover_schema(self, connection_string: str, include_sample_data: bool = True, max_sample_rows: int = 5,
                             schema_name: str = None, schema_description: str = None,
                             schema_tags: list = None, schema_category: str = None) -> str:
+        """Discover database schema and store as MCP resource, as a JSON string."""
+        return _dumps(await self.discover_schema_raw(
+            connection_string, include_sample_data, max_sample_rows, schema_name,
+            schema_description, schema_tags, schema_category
+        ))
+    
+    async def discover_schema_raw(self, connection_string: str, include_sample_data: bool = True, max_sample_rows: int = 5,
+                                schema_name: str = None, schema_description: str = None,
+                                schema_tags: list = None, schema_category: str = None) -> Dict[str, Any]:
         """Discover database schema and store as MCP resource."""
         try:
             # Create engine
-            engine = create_engine(connection_string)
+            engine = _get_engine(connection_string)
             inspector = inspect(engine)
             
             # Get database type from connection string
@@ -341,10 +795,30 @@ Return a JSON response with:
                 "discovered_at": str(pd.Timestamp.now())
             }
             
+            # Reflect columns and keys for all tables at once; dialects that support it
+            # answer each with a single catalog query instead of one per table
+            multi_columns = inspector.get_multi_columns()
+            multi_pks = inspector.get_multi_pk_constraint()
+            multi_fks = inspector.get_multi_foreign_keys()
+            
+            # Sample queries are independent, so they run concurrently on pooled connections
+            samples = {}
+            if include_sample_data:
+                semaphore = asyncio.Semaphore(_SAMPLE_QUERY_CONCURRENCY)
+                
+                async def fetch_sample(table_name: str) -> List[Dict[str, Any]]:
+                    async with semaphore:
+                        return await asyncio.to_thread(self._fetch_sample_data, engine, table_name, max_sample_rows)
+                
+                sample_lists = await asyncio.gather(*(fetch_sample(table_name) for table_name in table_names))
+                samples = dict(zip(table_names, sample_lists))
+            
             # Process each table
             for table_name in table_names:
+                key = (None, table_name)
+                
                 # Get column information
-                columns = inspector.get_columns(table_name)
+                columns = multi_columns.get(key, [])
                 column_info = []
                 
                 for col in columns:
@@ -358,11 +832,11 @@ Return a JSON response with:
                     })
                 
                 # Get primary keys
-                pk = inspector.get_pk_constraint(table_name)
+                pk = multi_pks.get(key) or {}
                 primary_keys = pk.get('constrained_columns', [])
                 
                 # Get foreign keys
-                fks = inspector.get_foreign_keys(table_name)
+                fks = multi_fks.get(key, [])
                 foreign_keys = []
                 for fk in fks:
                     foreign_keys.append({
@@ -377,19 +851,8 @@ Return a JSON response with:
                         "references": f"{fk['referred_table']}.{fk['referred_columns'][0]}"
                     })
                 
-                # Get sample data if requested
-                sample_data = []
-                if include_sample_data:
-                    try:
-                        with engine.connect() as conn:
-                            result = conn.execute(text(f"SELECT * FROM {table_name} LIMIT {max_sample_rows}"))
-                            rows = result.fetchall()
-                            columns = result.keys()
-                            
-                            for row in rows:
-                                sample_data.append(dict(zip(columns, row)))
-                    except Exception as e:
-                        sample_data = [{"error": f"Could not fetch sample data: {str(e)}"}]
+                # Sample data, if requested
+                sample_data = samples.get(table_name, [])
                 
                 # Store table information
                 schema_data["tables"][table_name] = {
@@ -400,9 +863,16 @@ Return a JSON response with:
                     "row_count": len(sample_data) if sample_data else 0
                 }
             
+            # Render the prompt block once here rather than on every generate_sql call;
+            # the version changes exactly when the rendered schema does
+            pack_text = _render_schema_context(schema_data)
+            schema_data["schema_pack"] = {
+                "version": hashlib.md5(pack_text.encode()).hexdigest(),
+                "text": pack_text
+            }
+            
             # Store as enhanced resource
-            from core.resource_manager import ResourceManager
-            resource_manager = ResourceManager()
+            resource_manager = self._resource_manager()
             
             # Generate schema URI
             schema_uri = f"resource://schemas/{db_type}_{hash(connection_string) % 10000}.json"
@@ -416,6 +886,12 @@ Return a JSON response with:
                 tags=schema_tags,
                 category=schema_category
             )
+            # Other processes (e.g. cleanup_resources.py) read the journal from disk
+            await resource_manager.flush()
+            
+            # Prompts built from an earlier discovery of this schema are out of date
+            for cache_key in [key for key in self._prompt_cache if key[1] == (stored_uri or schema_uri)]:
+                del self._prompt_cache[cache_key]
             
             result = {
                 "schema_uri": stored_uri or schema_uri,
@@ -425,13 +901,26 @@ Return a JSON response with:
                 "schema_data": schema_data
             }
             
-            return json.dumps(result, indent=2, default=str)
+            return result
             
         except Exception as e:
-            return json.dumps({
+            return {
                 "error": str(e),
                 "status": "failed"
-            }, indent=2)
+            }
+    
+    def _fetch_sample_data(self, engine: Engine, table_name: str, max_rows: int) -> List[Dict[str, Any]]:
+        """Fetch the first rows of a table, or a single error entry if that fails."""
+        try:
+            # A Core statement rather than SQL text: SQLAlchemy caches its compiled form,
+            # quotes the table name as the dialect needs, and sends LIMIT as a parameter
+            statement = select(literal_column("*")).select_from(table(table_name)).limit(max_rows)
+            with engine.connect() as conn:
+                result = conn.execute(statement)
+                columns = result.keys()
+                return [dict(zip(columns, row)) for row in result.fetchall()]
+        except Exception as e:
+            return [{"error": f"Could not fetch sample data: {str(e)}"}]
     
     def _extract_schema_from_text(self, schema_text: str) -> Dict[str, Any]:
         """Extract schema information from formatted text when JSON parsing fails."""
@@ -442,75 +931,46 @@ Return a JSON response with:
         }
         
         try:
-            lines = schema_text.split('\n')
-            current_table = None
-            in_columns_section = False
+            # Extract database type (the last mention wins)
+            for match in _DB_TYPE_RE.finditer(schema_text):
+                schema_data["database_type"] = match.group("db_type").strip()
             
-            for line in lines:
-                line = line.strip()
-                
-                # Extract database type
-                if "Database Type:" in line:
-                    schema_data["database_type"] = line.split("Database Type:")[1].strip()
-                
-                # Extract table name
-                elif line.startswith("## Table:"):
-                    table_name = line.split("## Table:")[1].strip()
-                    current_table = table_name
-                    in_columns_section = False
-                    schema_data["tables"][table_name] = {
-                        "columns": [],
-                        "foreign_keys": []
-                    }
+            # Each table section runs up to the next table heading
+            headings = list(_TABLE_HEADING_RE.finditer(schema_text))
+            for i, heading in enumerate(headings):
+                section_end = headings[i + 1].start() if i + 1 < len(headings) else len(schema_text)
+                section = schema_text[heading.end():section_end]
                 
-                # Start of columns section
-                elif line == "**Columns:**" and current_table:
-                    in_columns_section = True
-                
-                # Extract column information
-                elif line.startswith("- ") and current_table and in_columns_section and ":" in line:
-                    # Format: "- column_name: column_type (PRIMARY KEY)"
-                    col_info = line[2:].split(":")
-                    if len(col_info) >= 2:
-                        col_name = col_info[0].strip()
-                        col_type_part = col_info[1].strip()
-                        
-                        # Extract type and check for primary key
-                        is_primary_key = "(PRIMARY KEY)" in col_type_part
-                        col_type = col_type_part.replace("(PRIMARY KEY)", "").strip()
-                        
-                        schema_data["tables"][current_table]["columns"].append({
-                            "name": col_name,
-                            "type": col_type,
-                            "primary_key": is_primary_key
+                # Format: "- column_name: column_type (PRIMARY KEY)" under **Columns:**, up to a blank line
+                columns = []
+                for block in _COLUMNS_BLOCK_RE.finditer(section):
+                    for column in _COLUMN_RE.finditer(block.group("body")):
+                        col_type = column.group("type").strip()
+                        columns.append({
+                            "name": column.group("name").strip(),
+                            "type": col_type.replace("(PRIMARY KEY)", "").strip(),
+                            "primary_key": "(PRIMARY KEY)" in col_type
                         })
                 
-                # End of columns section (empty line or new section)
-                elif line == "" and in_columns_section:
-                    in_columns_section = False
-                
-                # Extract relationships
-                elif line.startswith("- ") and "->" in line and "Table Relationships" in schema_text:
-                    # Format: "- table.column -> referenced_table.referenced_column"
-                    rel_parts = line[2:].split("->")
-                    if len(rel_parts) == 2:
-                        left_side = rel_parts[0].strip()
-                        right_side = rel_parts[1].strip()
-                        
-                        if "." in left_side and "." in right_side:
-                            left_parts = left_side.split(".")
-                            right_parts = right_side.split(".")
-                            
-                            if len(left_parts) == 2 and len(right_parts) == 2:
-                                schema_data["relationships"].append({
-                                    "table": left_parts[0].strip(),
-                                    "column": left_parts[1].strip(),
-                                    "references": right_side
-                                })
-            
-            print(f"📋 Extracted schema: {len(schema_data['tables'])} tables, {len(schema_data['relationships'])} relationships")
+                schema_data["tables"][heading.group("table").strip()] = {
+                    "columns": columns,
+                    "foreign_keys": []
+                }
+            
+            # Extract relationships; format: "- table.column -> referenced_table.referenced_column"
+            if "Table Relationships" in schema_text:
+                for match in _RELATIONSHIP_RE.finditer(schema_text):
+                    left_parts = match.group("left").split(".")
+                    right_side = match.group("right").strip()
+                    if len(left_parts) == 2 and right_side.count(".") == 1 and "->" not in right_side:
+                        schema_data["relationships"].append({
+                            "table": left_parts[0].strip(),
+                            "column": left_parts[1].strip(),
+                            "references": right_side
+                        })
+            
             return schema_data
             
         except Exception as e:
             print(f"Error extracting schema from text: {e}")
-            return schema_data 
\ No newline at end of file
+            return schema_data
\ No newline at end of file
@@ -3,17 +3,28 @@ Tool Loader for the MCP server.
 Loads tool definitions from individual XML files and converts them to MCP Tool objects.
 """
 
+import hashlib
 import xml.etree.ElementTree as ET
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from mcp.types import Tool
 
 class ToolLoader:
     """Loads tool definitions from XML files."""
     
+    # tools directory -> (manifest of its XML files, tools loaded from them), shared by
+    # every loader in the process so an unchanged directory is never loaded twice
+    _loaded: Dict[Path, Tuple[str, List[Tool]]] = {}
+    
     def __init__(self, tools_dir: str = "src/tools"):
         self.tools_dir = Path(tools_dir)
         self.tools_cache: Dict[str, Tool] = {}
+        
+        # Parsed XML, built tools and examples per file, tagged with the file's
+        # mtime so an edited file is parsed again and an unchanged one never is
+        self._xml_cache: Dict[Path, Tuple[int, ET.Element]] = {}
+        self._tool_objects: Dict[Path, Tuple[int, Tool]] = {}
+        self._examples_cache: Dict[Path, Tuple[int, List[Dict[str, Any]]]] = {}
     
     def load_all_tools(self) -> List[Tool]:
         """Load all tools from XML files in the tools directory."""
@@ -26,9 +37,17 @@ class ToolLoader:
         # Find all XML files in the tools directory
         xml_files = list(self.tools_dir.glob("*.xml"))
         
+        # Nothing added, removed or edited since the last load
+        manifest = self._manifest(xml_files)
+        loaded = ToolLoader._loaded.get(self.tools_dir.resolve())
+        if loaded is not None and loaded[0] == manifest:
+            for tool in loaded[1]:
+                self.tools_cache[tool.name] = tool
+            return list(loaded[1])
+        
         for xml_file in xml_files:
             try:
-                tool = self._load_tool_from_xml(xml_file)
+                tool = self._get_tool_from_xml(xml_file)
                 if tool:
                     tools.append(tool)
                     self.tools_cache[tool.name] = tool
@@ -36,12 +55,42 @@ class ToolLoader:
             except Exception as e:
                 print(f"Error loading tool from {xml_file}: {e}")
         
+        ToolLoader._loaded[self.tools_dir.resolve()] = (manifest, list(tools))
         return tools
     
+    def _manifest(self, xml_files: List[Path]) -> str:
+        """Digest of the names, sizes and mtimes of the tool XML files."""
+        digest = hashlib.blake2b(digest_size=16)
+        for xml_file in sorted(xml_files):
+            stat = xml_file.stat()
+            digest.update(f"{xml_file.name}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+        return digest.hexdigest()
+    
+    def _get_root(self, xml_file: Path) -> ET.Element:
+        """Parsed root element of an XML file, reparsing only if the file changed."""
+        mtime_ns = xml_file.stat().st_mtime_ns
+        cached = self._xml_cache.get(xml_file)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+        
+        root = ET.parse(xml_file).getroot()
+        self._xml_cache[xml_file] = (mtime_ns, root)
+        return root
+    
+    def _get_tool_from_xml(self, xml_file: Path) -> Tool:
+        """Tool defined by an XML file, rebuilt only if the file changed."""
+        mtime_ns = xml_file.stat().st_mtime_ns
+        cached = self._tool_objects.get(xml_file)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+        
+        tool = self._load_tool_from_xml(xml_file)
+        self._tool_objects[xml_file] = (mtime_ns, tool)
+        return tool
+    
     def _load_tool_from_xml(self, xml_file: Path) -> Tool:
         """Load a single tool from an XML file."""
-        tree = ET.parse(xml_file)
-        root = tree.getroot()
+        root = self._get_root(xml_file)
         
         # Extract tool name
         tool_name = root.get("name")
@@ -152,8 +201,12 @@ class ToolLoader:
             return []
         
         try:
-            tree = ET.parse(xml_file)
-            root = tree.getroot()
+            mtime_ns = xml_file.stat().st_mtime_ns
+            cached = self._examples_cache.get(xml_file)
+            if cached is not None and cached[0] == mtime_ns:
+                return cached[1]
+            
+            root = self._get_root(xml_file)
             
             examples = []
             examples_elem = root.find("examples")
@@ -182,6 +235,7 @@ class ToolLoader:
                     "output": output_params
                 })
             
+            self._examples_cache[xml_file] = (mtime_ns, examples)
             return examples
             
         except Exception as e:
@@ -194,5 +248,9 @@ class ToolLoader:
     
     def reload_tools(self) -> List[Tool]:
         """Reload all tools from XML files."""
+        ToolLoader._loaded.pop(self.tools_dir.resolve(), None)
         self.tools_cache.clear()
+        self._xml_cache.clear()
+        self._tool_objects.clear()
+        self._examples_cache.clear()
         return self.load_all_tools() 
\ No newline at end of file
@@ -5,9 +5,13 @@ Provides REST endpoints for testing with Postman while maintaining MCP functiona
 """
 
 import asyncio
-import json
+import hashlib
+import inspect
+import logging
+import orjson
 import os
 import sys
+import time
 from pathlib import Path
 from dotenv import load_dotenv
 from aiohttp import web
@@ -17,7 +21,7 @@ import urllib.parse
 # Add src to path for imports
 sys.path.append(str(Path(__file__).parent))
 
-from core.sql_tools import SQLTools
+from core.sql_tools import SQLTools, dispose_engines
 from core.resource_manager import ResourceManager
 from core.prompt_manager import PromptManager
 from core.tool_loader import ToolLoader
@@ -27,12 +31,59 @@ from core.search_service import SearchService
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Seconds between heartbeats sent to every SSE connection
+_SSE_HEARTBEAT_SECONDS = 30
+
+# A client whose SSE writes can't drain within this many seconds is disconnected,
+# so one slow reader neither stalls the heartbeat nor grows an unbounded buffer
+_SSE_WRITE_TIMEOUT_SECONDS = 5
+
+# Health probes get the same few bytes every time
+_HEALTH_BODY = b'{"status":"healthy"}'
+
+# Responses smaller than this aren't worth compressing
+_COMPRESS_MIN_BYTES = 1024
+
+@web.middleware
+async def _compress_middleware(request, handler):
+    """Compress sizeable responses for clients that accept gzip or deflate."""
+    response = await handler(request)
+    if (isinstance(response, web.Response) and isinstance(response.body, bytes)
+            and len(response.body) > _COMPRESS_MIN_BYTES):
+        # Picks the coding from Accept-Encoding, leaving the body alone if there is none
+        response.enable_compression()
+    return response
+
+def _encode(payload) -> bytes:
+    """Encode a response payload as JSON; values JSON can't represent become str()."""
+    return orjson.dumps(payload, default=str, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS)
+
+def _json_response(payload, status: int = 200) -> web.Response:
+    """JSON response encoded with orjson."""
+    return web.Response(body=_encode(payload), status=status, content_type="application/json")
+
+def _json_error(error_class, message: str) -> web.HTTPException:
+    """HTTP error exception carrying the usual JSON error body, ready to raise."""
+    return error_class(
+        text=_encode({"status": "error", "error": message}).decode(),
+        content_type="application/json"
+    )
+
+def _static_response(request, body: bytes, etag: str) -> web.Response:
+    """Response for a body fixed for the server's lifetime; clients and caches may reuse it."""
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=60"}
+    if etag in request.headers.get("If-None-Match", ""):
+        return web.Response(status=304, headers=headers)
+    return web.Response(body=body, content_type="application/json", headers=headers)
+
 class HTTPMCPServer:
     """HTTP wrapper for the MCP server with REST endpoints."""
     
     def __init__(self):
-        self.sql_tools = SQLTools()
         self.resource_manager = ResourceManager()
+        self.sql_tools = SQLTools(self.resource_manager)
         self.prompt_manager = PromptManager()
         self.tool_loader = ToolLoader()
         self.sql_explanation_helper = SQLExplanationHelper()
@@ -42,153 +93,281 @@ class HTTPMCPServer:
         self.tools = self.tool_loader.load_all_tools()
         self.active_connections = {}
         
+        # One task sends heartbeats to all SSE connections; each connection's handler
+        # waits on its event, which the task sets when a write to that client fails
+        self._sse_closed = {}
+        self._heartbeat_task = None
+        
+        # Admission control for tool calls: at most MCP_MAX_INFLIGHT run at once and
+        # MCP_MAX_QUEUED wait for a slot; anything beyond that is turned away with a 503
+        self._tool_semaphore = asyncio.Semaphore(int(os.getenv("MCP_MAX_INFLIGHT", "32")))
+        self._tool_queue_limit = int(os.getenv("MCP_MAX_QUEUED", "64"))
+        self._tool_queued = 0
+        
+        # Encoded resource listings keyed by endpoint and parameters, reused for
+        # RESOURCE_LIST_CACHE_TTL seconds so polling clients don't each hit the store
+        self._listing_cache = {}
+        self._listing_cache_ttl = float(os.getenv("RESOURCE_LIST_CACHE_TTL", "2"))
+        self._listing_cache_size = 256
+        
+        # URI -> task of the resource read in progress, shared by concurrent requests
+        self._inflight_reads = {}
+        
+        # Tool name -> handler taking (tool_name, arguments)
+        self._tool_handlers = {
+            "generate_sql": self._tool_generate_sql,
+            "validate_sql": self._tool_validate_sql,
+            "execute_sql": self._tool_execute_sql,
+            "discover_schema": self._tool_discover_schema,
+            "search_resources": self._tool_search_resources,
+            "create_viz": self._tool_create_viz,
+            "predictive_model": self._tool_predictive_model
+        }
+        
+        # The tool list never changes after startup, so its encodings are built once
+        self._tools_payload = orjson.dumps({
+            "status": "success",
+            "tools": [
+                {
+                    "name": tool.name,
+                    "description": tool.description,
+                    "parameters": tool.inputSchema.get("properties", {}),
+                    "required": tool.inputSchema.get("required", [])
+                } for tool in self.tools
+            ]
+        })
+        self._sse_tools_frame = b"data: " + orjson.dumps({
+            'type': 'tools',
+            'tools': [
+                {
+                    'name': t.name,
+                    'description': t.description,
+                    'parameters': t.inputSchema.get("properties", {})
+                } for t in self.tools
+            ]
+        }) + b"\n\n"
+        self._heartbeat_frame = b'data: {"type":"heartbeat"}\n\n'
+        self._tools_etag = f'"{hashlib.blake2b(self._tools_payload, digest_size=16).hexdigest()}"'
+        
         print(f"Loaded {len(self.tools)} tools:")
         for tool in self.tools:
             print(f"  - {tool.name}: {tool.description}")
     
     async def handle_tool_call(self, request):
         """Handle tool call requests via HTTP POST."""
+        return await self._with_tool_slot(self._call_tool, request)
+    
+    async def handle_execute_sql_stream(self, request):
+        """Stream execute_sql results via HTTP POST without buffering them."""
+        return await self._with_tool_slot(self._stream_execute_sql, request)
+    
+    async def _with_tool_slot(self, handler, request):
+        """Run a tool request handler once a tool slot is free, or answer 503 if too many are waiting."""
+        if self._tool_semaphore.locked() and self._tool_queued >= self._tool_queue_limit:
+            response = _json_response({
+                "status": "busy",
+                "error": "Too many tool calls in progress, retry shortly"
+            }, status=503)
+            response.headers["Retry-After"] = "1"
+            return response
+        
+        self._tool_queued += 1
         try:
-            data = await request.json()
+            await self._tool_semaphore.acquire()
+        finally:
+            self._tool_queued -= 1
+        
+        try:
+            return await handler(request)
+        finally:
+            self._tool_semaphore.release()
+    
+    async def _call_tool(self, request):
+        """Run the tool named in a POST /tool request."""
+        try:
+            data = await request.json(loads=orjson.loads)
             tool_name = data.get("name")
             arguments = data.get("arguments", {})
             
-            if tool_name == "generate_sql":
-                result = await self.sql_tools.generate_sql(
-                    arguments.get("nl_query"),
-                    arguments.get("db_type", "postgresql"),
-                    arguments.get("schema_uri")
-                )
-                
-                result_data = json.loads(result)
-                
-                # Generate explanation if requested
-                if arguments.get("include_explanation", False):
-                    sql_query = result_data.get("sql_query")
-                    if sql_query:
-                        explanation = await self.sql_explanation_helper.generate_explanation(
-                            sql_query, 
-                            arguments.get("target_audience", "business_user")
-                        )
-                        result_data["explanation"] = explanation
-                        result = json.dumps(result_data, indent=2)
-                
-                return web.json_response({
-                    "status": "success",
-                    "tool": tool_name,
-                    "result": json.loads(result)
-                })
-            
-            elif tool_name == "validate_sql":
-                result = await self.sql_tools.validate_sql(
-                    arguments.get("sql_query")
-                )
-                return web.json_response({
-                    "status": "success",
-                    "tool": tool_name,
-                    "result": json.loads(result)
-                })
+            handler = self._tool_handlers.get(tool_name)
+            if handler is None:
+                raise _json_error(web.HTTPBadRequest, f"Unknown tool: {tool_name}")
             
-            elif tool_name == "execute_sql":
-                result = await self.sql_tools.execute_sql(
-                    arguments.get("sql_query"),
-                    arguments.get("db_connection", "sqlite:///./data/analytics.db"),
-                    arguments.get("store_as_resource", True),
-                    arguments.get("resource_name"),
-                    arguments.get("resource_description"),
-                    arguments.get("resource_tags"),
-                    arguments.get("resource_category"),
-                    arguments.get("max_rows", 1000)
-                )
+            return await handler(tool_name, arguments)
                 
-                return web.json_response({
-                    "status": "success",
-                    "tool": tool_name,
-                    "result": json.loads(result)
-                })
+        except web.HTTPException:
+            raise
+        except Exception as e:
+            logger.exception("Tool call failed")
+            raise _json_error(web.HTTPInternalServerError, str(e))
+    
+    async def _stream_execute_sql(self, request):
+        """Write a query's rows to the client chunk by chunk, in execute_sql's result format."""
+        response = None
+        row_count = 0
+        try:
+            data = await request.json(loads=orjson.loads)
+            arguments = data.get("arguments", {})
+            sql_query = arguments.get("sql_query")
             
-            elif tool_name == "discover_schema":
-                result = await self.sql_tools.discover_schema(
-                    arguments.get("connection_string"),
-                    arguments.get("include_sample_data", True),
-                    arguments.get("max_sample_rows", 5),
-                    arguments.get("schema_name"),
-                    arguments.get("schema_description"),
-                    arguments.get("schema_tags"),
-                    arguments.get("schema_category")
-                )
-                
-                return web.json_response({
-                    "status": "success",
-                    "tool": tool_name,
-                    "result": json.loads(result)
-                })
+            rows_stream = self.sql_tools.iter_rows(
+                sql_query,
+                arguments.get("db_connection", "sqlite:///./data/analytics.db"),
+                arguments.get("max_rows", 0)
+            )
+            async for columns, rows in rows_stream:
+                if response is None:
+                    response = web.StreamResponse(headers={"Content-Type": "application/json"})
+                    await response.prepare(request)
+                    await response.write(
+                        b'{"sql_query":' + _encode(sql_query) + b',"columns":' + _encode(columns) + b',"data":['
+                    )
+                if rows:
+                    await response.write(
+                        (b"," if row_count else b"") + b",".join(_encode(dict(zip(columns, row))) for row in rows)
+                    )
+                    row_count += len(rows)
+        
+        except Exception as e:
+            if response is None:
+                logger.exception("Streaming execute_sql failed")
+                raise _json_error(web.HTTPInternalServerError, str(e))
             
-            elif tool_name == "search_resources":
-                result = self.search_service.search_resources(
-                    query=arguments.get("query"),
-                    tags=arguments.get("tags"),
-                    any_tags=arguments.get("any_tags"),
-                    category=arguments.get("category"),
-                    resource_type=arguments.get("resource_type"),
-                    created_after=arguments.get("created_after"),
-                    created_before=arguments.get("created_before"),
-                    min_access_count=arguments.get("min_access_count", 0),
-                    limit=arguments.get("limit", 50),
-                    sort_by=arguments.get("sort_by", "created_at"),
-                    sort_order=arguments.get("sort_order", "desc")
+            # Headers are already sent; close the document with the error instead
+            await response.write(
+                b'],"row_count":' + _encode(row_count) + b',"error":' + _encode(str(e)) + b',"status":"failed"}'
+            )
+            await response.write_eof()
+            return response
+        
+        await response.write(b'],"row_count":' + _encode(row_count) + b',"status":"executed"}')
+        await response.write_eof()
+        return response
+    
+    async def _tool_generate_sql(self, tool_name, arguments):
+        """Run generate_sql, adding an explanation if requested."""
+        result = await self.sql_tools.generate_sql_raw(
+            arguments.get("nl_query"),
+            arguments.get("db_type", "postgresql"),
+            arguments.get("schema_uri")
+        )
+        
+        # Generate explanation if requested
+        if arguments.get("include_explanation", False):
+            sql_query = result.get("sql_query")
+            if sql_query:
+                explanation = await self.sql_explanation_helper.generate_explanation(
+                    sql_query, 
+                    arguments.get("target_audience", "business_user")
                 )
-                
-                return web.json_response({
-                    "status": "success",
-                    "tool": tool_name,
-                    "result": result
-                })
-            
-            elif tool_name == "create_viz":
-                return web.json_response({
-                    "status": "not_implemented",
-                    "tool": tool_name,
-                    "message": "Visualization tool will be implemented in Day 3"
-                })
-            
-            elif tool_name == "predictive_model":
-                return web.json_response({
-                    "status": "not_implemented",
-                    "tool": tool_name,
-                    "message": "Predictive model tool will be implemented in Day 4"
-                })
-            
-            else:
-                return web.json_response({
-                    "status": "error",
-                    "error": f"Unknown tool: {tool_name}"
-                }, status=400)
-                
-        except Exception as e:
-            return web.json_response({
-                "status": "error",
-                "error": str(e)
-            }, status=500)
+                result["explanation"] = explanation
+        
+        return _json_response({
+            "status": "success",
+            "tool": tool_name,
+            "result": result
+        })
     
-    async def handle_list_tools(self, request):
-        """List all available tools."""
-        tools_data = []
-        for tool in self.tools:
-            tools_data.append({
-                "name": tool.name,
-                "description": tool.description,
-                "parameters": tool.inputSchema.get("properties", {}),
-                "required": tool.inputSchema.get("required", [])
-            })
+    async def _tool_validate_sql(self, tool_name, arguments):
+        """Run validate_sql."""
+        result = await self.sql_tools.validate_sql_raw(
+            arguments.get("sql_query")
+        )
+        return _json_response({
+            "status": "success",
+            "tool": tool_name,
+            "result": result
+        })
+    
+    async def _tool_execute_sql(self, tool_name, arguments):
+        """Run execute_sql."""
+        result = await self.sql_tools.execute_sql_raw(
+            arguments.get("sql_query"),
+            arguments.get("db_connection", "sqlite:///./data/analytics.db"),
+            arguments.get("store_as_resource", True),
+            arguments.get("resource_name"),
+            arguments.get("resource_description"),
+            arguments.get("resource_tags"),
+            arguments.get("resource_category"),
+            arguments.get("max_rows", 1000)
+        )
+        self._listing_cache.clear()
         
-        return web.json_response({
+        return _json_response({
             "status": "success",
-            "tools": tools_data
+            "tool": tool_name,
+            "result": result
         })
     
+    async def _tool_discover_schema(self, tool_name, arguments):
+        """Run discover_schema."""
+        result = await self.sql_tools.discover_schema_raw(
+            arguments.get("connection_string"),
+            arguments.get("include_sample_data", True),
+            arguments.get("max_sample_rows", 5),
+            arguments.get("schema_name"),
+            arguments.get("schema_description"),
+            arguments.get("schema_tags"),
+            arguments.get("schema_category")
+        )
+        self._listing_cache.clear()
+        
+        return _json_response({
+            "status": "success",
+            "tool": tool_name,
+            "result": result
+        })
+    
+    async def _tool_search_resources(self, tool_name, arguments):
+        """Run search_resources."""
+        result = self.search_service.search_resources(
+            query=arguments.get("query"),
+            tags=arguments.get("tags"),
+            any_tags=arguments.get("any_tags"),
+            category=arguments.get("category"),
+            resource_type=arguments.get("resource_type"),
+            created_after=arguments.get("created_after"),
+            created_before=arguments.get("created_before"),
+            min_access_count=arguments.get("min_access_count", 0),
+            limit=arguments.get("limit", 50),
+            sort_by=arguments.get("sort_by", "created_at"),
+            sort_order=arguments.get("sort_order", "desc"),
+            exact_only=arguments.get("exact_only", False),
+            fields=arguments.get("fields")
+        )
+        
+        return _json_response({
+            "status": "success",
+            "tool": tool_name,
+            "result": result
+        })
+    
+    async def _tool_create_viz(self, tool_name, arguments):
+        """Placeholder for the visualization tool."""
+        return _json_response({
+            "status": "not_implemented",
+            "tool": tool_name,
+            "message": "Visualization tool will be implemented in Day 3"
+        })
+    
+    async def _tool_predictive_model(self, tool_name, arguments):
+        """Placeholder for the predictive model tool."""
+        return _json_response({
+            "status": "not_implemented",
+            "tool": tool_name,
+            "message": "Predictive model tool will be implemented in Day 4"
+        })
+    
+    async def handle_list_tools(self, request):
+        """List all available tools."""
+        return _static_response(request, self._tools_payload, self._tools_etag)
+    
     async def handle_list_resources(self, request):
         """List all available resources."""
+        return await self._cached_listing(("list",), self._resource_list)
+    
+    async def _resource_list(self):
+        """Payload for the resource list."""
         resources = await self.resource_manager.list_resources()
         resources_data = []
         for resource in resources:
@@ -199,10 +378,32 @@ class HTTPMCPServer:
                 "mimeType": resource.mimeType
             })
         
-        return web.json_response({
+        return {
             "status": "success",
             "resources": resources_data
-        })
+        }
+    
+    async def _cached_listing(self, key, producer) -> web.Response:
+        """Response for a listing payload, reusing its encoding within the cache TTL."""
+        now = time.monotonic()
+        cached = self._listing_cache.get(key)
+        if cached is not None and now - cached[0] < self._listing_cache_ttl:
+            body = cached[1]
+        else:
+            payload = producer()
+            if inspect.isawaitable(payload):
+                payload = await payload
+            body = _encode(payload)
+            self._listing_cache.pop(key, None)
+            self._listing_cache[key] = (now, body)
+            while len(self._listing_cache) > self._listing_cache_size:
+                del self._listing_cache[next(iter(self._listing_cache))]
+        
+        return web.Response(
+            body=body,
+            content_type="application/json",
+            headers={"Cache-Control": f"max-age={int(self._listing_cache_ttl)}"}
+        )
     
     async def handle_search_resources(self, request):
         """Search resources with query parameters."""
@@ -214,12 +415,16 @@ class HTTPMCPServer:
             category = request.query.get("category")
             resource_type = request.query.get("type")
             limit = int(request.query.get("limit", 50))
+            exact_only = request.query.get("exact", "false").lower() == "true"
+            fields = request.query.get("fields")
             
             # Parse tags from comma-separated string
             if tags:
                 tags = [tag.strip() for tag in tags.split(",")]
             if any_tags:
                 any_tags = [tag.strip() for tag in any_tags.split(",")]
+            if fields:
+                fields = tuple(field.strip() for field in fields.split(","))
             
             result = self.search_service.search_resources(
                 query=query,
@@ -227,66 +432,68 @@ class HTTPMCPServer:
                 any_tags=any_tags,
                 category=category,
                 resource_type=resource_type,
-                limit=limit
+                limit=limit,
+                exact_only=exact_only,
+                fields=fields
             )
             
-            return web.json_response(result)
+            return _json_response(result)
             
         except Exception as e:
-            return web.json_response({
-                "status": "error",
-                "error": str(e)
-            }, status=500)
+            raise _json_error(web.HTTPInternalServerError, str(e))
     
     async def handle_popular_resources(self, request):
         """Get most frequently accessed resources."""
         try:
             limit = int(request.query.get("limit", 10))
-            result = self.search_service.get_popular_resources(limit)
-            return web.json_response(result)
+            return await self._cached_listing(
+                ("popular", limit), lambda: self.search_service.get_popular_resources(limit)
+            )
         except Exception as e:
-            return web.json_response({
-                "status": "error",
-                "error": str(e)
-            }, status=500)
+            raise _json_error(web.HTTPInternalServerError, str(e))
     
     async def handle_recent_resources(self, request):
         """Get recently created resources."""
         try:
             limit = int(request.query.get("limit", 10))
-            result = self.search_service.get_recent_resources(limit)
-            return web.json_response(result)
+            return await self._cached_listing(
+                ("recent", limit), lambda: self.search_service.get_recent_resources(limit)
+            )
         except Exception as e:
-            return web.json_response({
-                "status": "error",
-                "error": str(e)
-            }, status=500)
+            raise _json_error(web.HTTPInternalServerError, str(e))
     
     async def handle_read_resource(self, request):
         """Read a specific resource."""
         uri = request.match_info.get("uri")
         if not uri:
-            return web.json_response({
-                "status": "error",
-                "error": "Resource URI is required"
-            }, status=400)
+            raise _json_error(web.HTTPBadRequest, "Resource URI is required")
         
         # URL decode the URI to handle special characters
         decoded_uri = urllib.parse.unquote(uri)
         
-        print(f"🔍 Reading resource: {decoded_uri}")
+        logger.debug("Reading resource: %s", decoded_uri)
         
-        content = await self.resource_manager.read_resource(decoded_uri)
-        return web.json_response({
+        content = await self._read_resource_once(decoded_uri)
+        return _json_response({
             "status": "success",
             "uri": decoded_uri,
             "content": content[0].text if content else ""
         })
     
+    async def _read_resource_once(self, uri):
+        """Read a resource, sharing one read among concurrent requests for the same URI."""
+        task = self._inflight_reads.get(uri)
+        if task is None:
+            task = asyncio.ensure_future(self.resource_manager.read_resource(uri))
+            self._inflight_reads[uri] = task
+            task.add_done_callback(lambda _: self._inflight_reads.pop(uri, None))
+        # A client disconnecting cancels only its own wait, not the read the others share
+        return await asyncio.shield(task)
+    
     async def handle_list_prompts(self, request):
         """List all available prompts."""
         prompts = await self.prompt_manager.list_prompts()
-        return web.json_response({
+        return _json_response({
             "status": "success",
             "prompts": prompts
         })
@@ -295,13 +502,10 @@ class HTTPMCPServer:
         """Get a specific prompt template."""
         name = request.match_info.get("name")
         if not name:
-            return web.json_response({
-                "status": "error",
-                "error": "Prompt name is required"
-            }, status=400)
+            raise _json_error(web.HTTPBadRequest, "Prompt name is required")
         
         prompt_content = await self.prompt_manager.get_prompt(name)
-        return web.json_response({
+        return _json_response({
             "status": "success",
             "name": name,
             "content": prompt_content
@@ -322,69 +526,103 @@ class HTTPMCPServer:
         await response.prepare(request)
         
         # Store the connection
+        closed = asyncio.Event()
         self.active_connections[connection_id] = response
+        self._sse_closed[connection_id] = closed
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
         
         try:
             # Send initial tools list
-            tools_data = {
-                'type': 'tools',
-                'tools': [
-                    {
-                        'name': t.name,
-                        'description': t.description,
-                        'parameters': t.inputSchema.get("properties", {})
-                    } for t in self.tools
-                ]
-            }
-            await response.write(f"data: {json.dumps(tools_data)}\n\n".encode())
+            await asyncio.wait_for(response.write(self._sse_tools_frame), _SSE_WRITE_TIMEOUT_SECONDS)
             
-            # Keep the connection alive
-            while True:
-                await asyncio.sleep(30)  # Send heartbeat every 30 seconds
-                await response.write(f"data: {json.dumps({'type': 'heartbeat'})}\n\n".encode())
+            # Keep the connection alive; heartbeats come from the shared task
+            await closed.wait()
                 
         except asyncio.CancelledError:
             pass
         finally:
             # Clean up connection
-            if connection_id in self.active_connections:
-                del self.active_connections[connection_id]
-            await response.write_eof()
+            self.active_connections.pop(connection_id, None)
+            self._sse_closed.pop(connection_id, None)
+            try:
+                await asyncio.wait_for(response.write_eof(), _SSE_WRITE_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                # The client stopped reading; drop the connection instead of waiting on it
+                if request.transport is not None:
+                    request.transport.close()
         
         return response
     
+    async def _heartbeat_loop(self):
+        """Send a heartbeat to every SSE connection until none are left."""
+        while self.active_connections:
+            await asyncio.sleep(_SSE_HEARTBEAT_SECONDS)
+            connections = list(self.active_connections.items())
+            results = await asyncio.gather(
+                *(asyncio.wait_for(response.write(self._heartbeat_frame), _SSE_WRITE_TIMEOUT_SECONDS)
+                  for _, response in connections),
+                return_exceptions=True
+            )
+            
+            # A failed or stalled write means the client went away or can't keep up;
+            # release its handler
+            for (connection_id, _), result in zip(connections, results):
+                if isinstance(result, Exception) and connection_id in self._sse_closed:
+                    self._sse_closed[connection_id].set()
+    
+    def build_app(self) -> web.Application:
+        """Build the aiohttp application serving this server's endpoints."""
+        app = web.Application(middlewares=[_compress_middleware])
+        
+        # Busiest routes first; fixed paths ahead of the {uri} and {name} patterns
+        # that would otherwise also match them
+        app.add_routes([
+            # Health check
+            web.get('/health', lambda r: web.Response(body=_HEALTH_BODY, content_type="application/json")),
+            
+            # Tool endpoints
+            web.post('/tool', self.handle_tool_call),
+            
+            # Resource endpoints
+            web.get('/resources', self.handle_list_resources),
+            web.get('/resources/popular', self.handle_popular_resources),
+            web.get('/resources/recent', self.handle_recent_resources),
+            web.get('/resources/{uri}', self.handle_read_resource),
+            web.get('/search', self.handle_search_resources),
+            
+            web.post('/tool/execute_sql/stream', self.handle_execute_sql_stream),
+            web.get('/tools', self.handle_list_tools),
+            
+            # Prompt endpoints
+            web.get('/prompts', self.handle_list_prompts),
+            web.get('/prompts/{name}', self.handle_get_prompt),
+            
+            # SSE endpoint
+            web.get('/sse', self.sse_handler)
+        ])
+        app.on_cleanup.append(self._on_cleanup)
+        return app
+    
+    async def _on_cleanup(self, app):
+        """Release server resources when the application shuts down."""
+        # Don't lose resource metadata still waiting on the debounced flush
+        self.resource_manager.close()
+        dispose_engines()
+    
     async def start_server(self, host: str = "localhost", port: int = 8000):
         """Start the HTTP server."""
-        app = web.Application()
-        
-        # Tool endpoints
-        app.router.add_post('/tool', self.handle_tool_call)
-        app.router.add_get('/tools', self.handle_list_tools)
-        
-        # Resource endpoints
-        app.router.add_get('/resources', self.handle_list_resources)
-        app.router.add_get('/resources/{uri}', self.handle_read_resource)
-        app.router.add_get('/search', self.handle_search_resources)
-        app.router.add_get('/resources/popular', self.handle_popular_resources)
-        app.router.add_get('/resources/recent', self.handle_recent_resources)
-        
-        # Prompt endpoints
-        app.router.add_get('/prompts', self.handle_list_prompts)
-        app.router.add_get('/prompts/{name}', self.handle_get_prompt)
+        app = self.build_app()
         
-        # SSE endpoint
-        app.router.add_get('/sse', self.sse_handler)
-        
-        # Health check
-        app.router.add_get('/health', lambda r: web.json_response({"status": "healthy"}))
-        
-        runner = web.AppRunner(app)
+        # Keep idle connections open long enough for clients to reuse them
+        runner = web.AppRunner(app, keepalive_timeout=75)
         await runner.setup()
-        site = web.TCPSite(runner, host, port)
+        site = web.TCPSite(runner, host, port, backlog=2048)
         
         print(f"🚀 HTTP MCP Server running on http://{host}:{port}")
         print(f"📋 Available endpoints:")
         print(f"  POST /tool - Call a tool")
+        print(f"  POST /tool/execute_sql/stream - Stream query results")
         print(f"  GET  /tools - List all tools")
         print(f"  GET  /resources - List all resources")
         print(f"  GET  /resources/{{uri}} - Read a resource")
@@ -399,13 +637,31 @@ class HTTPMCPServer:
         await site.start()
         
         # Keep the server running
-        while True:
-            await asyncio.sleep(3600)  # Sleep for an hour
+        try:
+            while True:
+                await asyncio.sleep(3600)  # Sleep for an hour
+        finally:
+            await runner.cleanup()
+
+def create_app(argv=None) -> web.Application:
+    """Application factory, for running under another aiohttp host.
+    
+    Lets the server sit behind any front end that speaks HTTP/2 to clients, e.g.
+    ``python -m aiohttp.web -H 0.0.0.0 -P 8000 http_server:create_app`` from src/.
+    """
+    return HTTPMCPServer().build_app()
 
 async def main():
     """Main entry point for HTTP server."""
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
     server = HTTPMCPServer()
     await server.start_server()
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    # uvloop is a faster drop-in event loop; it isn't available on Windows
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main()) 
\ No newline at end of file